@@ -0,0 +1,242 @@
+"""
+Параллельная постраничная загрузка длинной истории свечей Bybit.
+
+Bybit отдаёт не больше 1000 свечей за запрос, поэтому диапазон [start, end]
+режется на страницы по start / end, страницы качаются параллельно в
+выделенном пуле потоков с ограничением частоты запросов, затем склеиваются,
+дедуплицируются по времени открытия и проверяются на пропуски.
+
+Возобновление: если задан cache_dir, каждая страница из закрытых свечей
+сохраняется на диск; повторный запуск берёт её оттуда и докачивает только
+недостающее.
+
+Запуск:
+    python -m crypt.backfill BTCUSDT --interval 1 --days 14 --out btc_1m.jsonl
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+import crypt.bit as bit
+
+PAGE_SIZE    = bit.KLINE_LIMIT    # максимум свечей в одном ответе Bybit
+_POOL_SIZE   = 8       # потоков в пуле загрузки
+_RATE_LIMIT  = 50.0    # запросов в секунду (лимит Bybit для market — 600 / 5 с на IP)
+_MAX_RETRIES = 3
+
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000,
+    "720": 43_200_000, "D": 86_400_000, "W": 604_800_000,
+}
+
+_KLINE_METHODS = {
+    "index": "get_index_price_kline",
+    "mark":  "get_mark_price_kline",
+    "last":  "get_kline",
+}
+
+
+class _RateLimiter:
+    """Блокирующий token bucket, общий для всех потоков загрузки."""
+
+    def __init__(self, rate: float):
+        self.rate   = rate
+        self.tokens = rate
+        self.ts     = time.monotonic()
+        self.lock   = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.ts) * self.rate)
+                self.ts = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_s = (1 - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+
+# один на процесс: параллельные fetch_klines (воркеры refresh, CLI) делят общий лимит
+_limiter = _RateLimiter(_RATE_LIMIT)
+
+
+def set_rate_limit(rate: float) -> None:
+    """Change the process-wide request rate shared by all fetch_klines calls."""
+    with _limiter.lock:
+        _limiter.rate   = rate
+        _limiter.tokens = min(_limiter.tokens, rate)
+
+
+def interval_ms(interval) -> int:
+    key = str(interval)
+    if key not in INTERVAL_MS:
+        raise ValueError(f"Unsupported interval for backfill: {interval}")
+    return INTERVAL_MS[key]
+
+
+def page_ranges(start_ms: int, end_ms: int, interval, page_size: int = PAGE_SIZE) -> list[tuple[int, int]]:
+    """Split [start_ms, end_ms] into inclusive (start, end) pages of ≤ page_size candles.
+
+    Page boundaries sit on a fixed grid (multiples of page_size candles since
+    the epoch), so the same closed page is produced on every run and its
+    cached copy can be reused.
+    """
+    span  = interval_ms(interval) * page_size
+    first = start_ms // span * span
+    return [(s, min(s + span - span // page_size, end_ms)) for s in range(first, end_ms + 1, span)]
+
+
+def _fetch_page(symbol: str, interval, start: int, end: int, kind: str) -> list[list[str]]:
+    """One page, oldest → newest, with retries."""
+    method = getattr(bit.get_session(), _KLINE_METHODS[kind])
+    for attempt in range(_MAX_RETRIES):
+        _limiter.acquire()
+        try:
+            res = method(
+                category="linear", symbol=symbol, interval=interval,
+                start=start, end=end, limit=PAGE_SIZE,
+            )
+            return list(reversed(res["result"]["list"]))
+        except Exception as e:
+            if attempt == _MAX_RETRIES - 1:
+                raise
+            logging.debug("backfill %s %s [%s..%s] retry %d: %s",
+                          symbol, interval, start, end, attempt + 1, e)
+            time.sleep(0.5 * 2 ** attempt)
+    return []
+
+
+def _page_file(cache_dir: Path, symbol: str, interval, kind: str, start: int, end: int) -> Path:
+    return cache_dir / f"{symbol}_{interval}_{kind}" / f"{start}-{end}.json"
+
+
+def _save_page(path: Path, rows: list) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(rows), encoding="utf-8")
+    tmp.replace(path)
+
+
+def fetch_klines(
+    symbol: str,
+    interval,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+    limit: int | None = None,
+    kind: str = "index",
+    max_workers: int = _POOL_SIZE,
+    cache_dir: Path | None = None,
+) -> list[list[str]]:
+    """Fetch candles for [start_ms, end_ms] (or the last *limit* candles), oldest → newest.
+
+    Rows are raw Bybit kline rows ([open_ts, open, high, low, close, ...] as
+    strings), merged across pages and deduplicated by open time. Pages whose
+    candles are all closed are cached under *cache_dir* and reused on the next
+    call, so an interrupted download resumes where it stopped. Requests of
+    all concurrent calls share one rate limit (see set_rate_limit).
+    """
+    step = interval_ms(interval)
+    now  = int(time.time() * 1000)
+    if end_ms is None:
+        end_ms = now
+    if start_ms is None:
+        if limit is None:
+            raise ValueError("Either start_ms or limit is required")
+        start_ms = (end_ms // step - limit + 1) * step
+
+    pages   = page_ranges(start_ms, end_ms, interval)
+    rows_by_page: dict[tuple[int, int], list] = {}
+
+    todo = []
+    for s, e in pages:
+        path = _page_file(cache_dir, symbol, interval, kind, s, e) if cache_dir else None
+        if path is not None and path.exists():
+            rows_by_page[(s, e)] = json.loads(path.read_text(encoding="utf-8"))
+        else:
+            todo.append((s, e, path))
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(todo))), thread_name_prefix="bf"
+    ) as pool:
+        futures = {
+            pool.submit(_fetch_page, symbol, interval, s, e, kind): (s, e, path)
+            for s, e, path in todo
+        }
+        error = None
+        for fut in concurrent.futures.as_completed(futures):
+            if fut.cancelled():
+                continue
+            s, e, path = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as exc:
+                # страница не скачалась: остальные в очереди отменяем, а уже
+                # скачанные (в т.ч. идущие сейчас) сохраняем — повтор их не тронет
+                if error is None:
+                    error = exc
+                    for f in futures:
+                        f.cancel()
+                continue
+            rows_by_page[(s, e)] = rows
+            # последнюю (ещё формирующуюся) свечу не кэшируем
+            if path is not None and e + step <= now:
+                _save_page(path, rows)
+        if error is not None:
+            raise error
+
+    merged: dict[int, list] = {}
+    for rows in rows_by_page.values():
+        for r in rows:
+            ts = int(r[0])
+            if start_ms <= ts <= end_ms:
+                merged[ts] = r
+    result = [merged[ts] for ts in sorted(merged)]
+
+    gaps = sum(1 for a, b in zip(result, result[1:]) if int(b[0]) - int(a[0]) != step)
+    if gaps:
+        logging.warning("backfill %s %s: %d gaps in %d candles", symbol, interval, gaps, len(result))
+    if limit is not None:
+        result = result[-limit:]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill Bybit kline history")
+    parser.add_argument("symbol")
+    parser.add_argument("--interval",  default="1")
+    parser.add_argument("--days",      type=float, default=7.0)
+    parser.add_argument("--kind",      choices=sorted(_KLINE_METHODS), default="index")
+    parser.add_argument("--workers",   type=int,   default=_POOL_SIZE)
+    parser.add_argument("--rate",      type=float, default=_RATE_LIMIT, help="requests per second")
+    parser.add_argument("--cache-dir", type=Path,  default=Path(".backfill"))
+    parser.add_argument("--out",       type=Path,  default=None, help="JSON lines; stdout if omitted")
+    args = parser.parse_args()
+
+    set_rate_limit(args.rate)
+    end   = int(time.time() * 1000)
+    start = end - int(args.days * 86_400_000)
+    t0    = time.perf_counter()
+    rows  = fetch_klines(
+        args.symbol, args.interval, start, end, kind=args.kind,
+        max_workers=args.workers, cache_dir=args.cache_dir,
+    )
+    lines = "".join(json.dumps(r) + "\n" for r in rows)
+    if args.out:
+        args.out.write_text(lines, encoding="utf-8")
+    else:
+        print(lines, end="")
+    print(f"{len(rows)} candles in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
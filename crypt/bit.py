@@ -1,18 +1,47 @@
 import bisect
 import datetime
 import logging
+import threading
 
-from pybit.unified_trading import HTTP
+from crypt.config import BYBIT_API_KEY, BYBIT_API_SECRET, BYBIT_ENDPOINT, ShortCriteria, LongCriteria
 
-from crypt.config import BYBIT_API_KEY, BYBIT_API_SECRET, ShortCriteria, LongCriteria
+RSI_PERIOD = 14
+KLINE_LIMIT = 1000    # Bybit's max candles per kline request
+HTTP_POOL_SIZE = 64   # keep-alive connections; covers the overbought / backfill worker pools
+RSI_WARMUP = 10 * RSI_PERIOD   # extra candles so Wilder smoothing converges before the first record
+HT_LIMIT   = 110 + RSI_WARMUP  # candle count for higher timeframes (1H / 4H / 1D)
 
-session = HTTP(
-    testnet=False,
-    api_key=BYBIT_API_KEY,
-    api_secret=BYBIT_API_SECRET,
-)
+_session      = None
+_session_lock = threading.Lock()
 
-RSI_PERIOD = 14
+
+def get_session():
+    """Return the shared pybit HTTP session, creating it on first use.
+
+    pybit (and its requests stack) is imported lazily so that importing
+    this module stays cheap and the web app can start serving immediately.
+    Safe to call from worker threads.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from pybit.unified_trading import HTTP
+                from requests.adapters import HTTPAdapter
+                session = HTTP(
+                    testnet=False,
+                    api_key=BYBIT_API_KEY,
+                    api_secret=BYBIT_API_SECRET,
+                )
+                if BYBIT_ENDPOINT:
+                    session.endpoint = BYBIT_ENDPOINT.rstrip("/")
+                # requests defaults to 10 pooled connections; worker threads
+                # beyond that would reconnect (TLS handshake) on every call
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.client.mount("https://", adapter)
+                session.client.mount("http://", adapter)
+                _session = session
+    return _session
 
 
 def calculate_rsi_series(prices: list, period: int = 14) -> list:
@@ -48,7 +77,7 @@ def calculate_rsi_series(prices: list, period: int = 14) -> list:
 
 
 def fetch_rsi_data(symbol: str, interval: int = 1, period: int = RSI_PERIOD, limit: int = 1000):
-    res = session.get_index_price_kline(
+    res = get_session().get_index_price_kline(
         category="linear", symbol=symbol, interval=interval, limit=limit,
     )
     candles = list(reversed(res["result"]["list"]))
@@ -118,11 +147,17 @@ def fetch_rsi_multi(
     base_interval: int = 15,
     base_limit: int = 110,
     period: int = RSI_PERIOD,
+    warmup: int = RSI_WARMUP,
+    ht_limit: int = HT_LIMIT,
 ):
     """Fetch RSI for base + 1H, 4H, 1D intervals, all aligned to base candles.
 
     base_interval — candle size in minutes for the base timeframe (1 or 15).
-    base_limit    — how many base candles to fetch.
+    base_limit    — how many base candles to return RSI for (first `period` are warm-up).
+    warmup        — extra older base candles fetched only to converge the RSI;
+                    trimmed so that warm-up alone never needs a second page.
+    ht_limit      — candle count for 1H / 4H / 1D.
+    Requests above Bybit's 1000-candle cap are paginated via crypt.backfill.
     Returns a list (oldest → newest) of dicts:
         time, price, rsi_15m, rsi_1h, rsi_4h, rsi_1d, day_high_so_far, is_short, ...
     Higher-TF fields can be None if no matching candle is found.
@@ -130,11 +165,12 @@ def fetch_rsi_multi(
     if criteria is None:
         criteria = ShortCriteria()
 
-    HT_LIMIT = 110  # candle count for higher timeframes (1H / 4H / 1D)
-
-    def _fetch_candles(interval, lim=HT_LIMIT):
+    def _fetch_candles(interval, lim=ht_limit):
         """Return candles sorted oldest → newest."""
-        res = session.get_index_price_kline(
+        if lim > KLINE_LIMIT:
+            import crypt.backfill as backfill   # lazy: backfill imports this module
+            return backfill.fetch_klines(symbol, interval, limit=lim)
+        res = get_session().get_index_price_kline(
             category="linear", symbol=symbol, interval=interval, limit=lim,
         )
         return list(reversed(res["result"]["list"]))
@@ -156,7 +192,11 @@ def fetch_rsi_multi(
         return lookup
 
     # --- fetch raw candles ---
-    candles_base = _fetch_candles(base_interval, lim=base_limit)
+    if base_limit <= KLINE_LIMIT:
+        # the oldest records of a full page are far from "now"; a page of
+        # extra requests per refresh is not worth their last bit of accuracy
+        warmup = min(warmup, KLINE_LIMIT - base_limit)
+    candles_base = _fetch_candles(base_interval, lim=base_limit + warmup)
     candles_1h   = _fetch_candles(60)
     candles_4h   = _fetch_candles(240)
     candles_1d   = _fetch_candles("D")
@@ -166,13 +206,14 @@ def fetch_rsi_multi(
     lookup_4h = _make_lookup(_rsi_map(candles_4h))
     lookup_1d = _make_lookup(_rsi_map(candles_1d))
 
-    # --- base RSI ---
+    # --- base RSI (warm-up candles only feed the smoothing, no records) ---
     closes_base = [float(c[4]) for c in candles_base]
     rsi_base    = calculate_rsi_series(closes_base, period)
+    skip        = max(0, len(candles_base) - base_limit)
 
     # First pass: build records without day_high_so_far
     result = []
-    for i, rsi in enumerate(rsi_base):
+    for i, rsi in enumerate(rsi_base[skip:], start=skip):
         ts_ms = int(candles_base[period + i][0])
         result.append({
             "time":    datetime.datetime.fromtimestamp(ts_ms / 1000),
@@ -5,12 +5,24 @@
 отредактируй словарь TICKERS ниже.
 """
 
+import os
 from dataclasses import dataclass
 
 # --- Bybit API credentials ---
 BYBIT_API_KEY    = 'gQD1td9XGAaMU0bU4j'
 BYBIT_API_SECRET = 'VYyJC1to8ZRFJMEGGZxFuo8J0fWnCDhuRsTA'
 
+# Переопределение REST-адреса Bybit, например http://127.0.0.1:8800 для crypt.mock_bybit.
+# Пусто — боевой api.bybit.com.
+BYBIT_ENDPOINT = os.environ.get("BYBIT_ENDPOINT", "")
+# Приватный WebSocket; по умолчанию — тот же хост, что и BYBIT_ENDPOINT.
+BYBIT_WS_ENDPOINT = os.environ.get("BYBIT_WS_ENDPOINT") or (
+    BYBIT_ENDPOINT.rstrip("/").replace("http", "ws", 1) + "/v5/private" if BYBIT_ENDPOINT else ""
+)
+
+# Токен для /api/admin/* (заголовок X-Admin-Token). Пусто — админ-эндпоинты выключены.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
 
 @dataclass
 class ShortCriteria:
@@ -0,0 +1,234 @@
+"""
+Нагрузочный прогон crypt/main.py против локального mock Bybit.
+
+Что делает:
+ - поднимает crypt.mock_bybit в фоновом потоке (задержка / ошибки / лимиты
+   настраиваются теми же флагами, что и у mock_bybit);
+ - запускает приложение (uvicorn crypt.main:app) отдельным процессом с
+   BYBIT_ENDPOINT, указывающим на mock, — внутри крутятся table_monitor и,
+   после POST /api/overbought/scan, run_scan;
+ - N потоков-«дашбордов» опрашивают API так же, как front/main.html;
+ - по окончании печатает по каждому эндпоинту: число запросов, ошибки,
+   throughput и p50 / p99 латентности, плюс счётчики запросов к mock.
+
+Запуск:
+    python -m crypt.loadtest --clients 20 --duration 60 --latency-ms 80
+    python -m crypt.loadtest --app-url http://127.0.0.1:8000 --no-mock   # уже запущенный сервис
+    python -m crypt.loadtest ... --json baseline.json                     # сохранить результат
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+import crypt.mock_bybit as mock_bybit
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _percentile(sorted_vals: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return float("nan")
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(pct / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+class _Recorder:
+    """Потокобезопасный сбор (endpoint, latency, ok)."""
+
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors    = defaultdict(int)
+
+    def add(self, endpoint: str, latency_s: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(latency_s)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed_s: float) -> dict:
+        out = {}
+        for ep, vals in sorted(self.latencies.items()):
+            vals = sorted(vals)
+            out[ep] = {
+                "count":  len(vals),
+                "errors": self.errors[ep],
+                "rps":    round(len(vals) / elapsed_s, 2),
+                "p50_ms": round(_percentile(vals, 50) * 1000, 1),
+                "p99_ms": round(_percentile(vals, 99) * 1000, 1),
+                "max_ms": round(vals[-1] * 1000, 1),
+            }
+        return out
+
+
+def _timed(rec: _Recorder, http: requests.Session, method: str, url: str,
+           endpoint: str, **kw) -> requests.Response | None:
+    t0 = time.perf_counter()
+    try:
+        resp = http.request(method, url, timeout=30, **kw)
+        ok   = resp.status_code < 500 and '"error"' not in resp.text[:200]
+        rec.add(endpoint, time.perf_counter() - t0, ok)
+        return resp
+    except requests.RequestException:
+        rec.add(endpoint, time.perf_counter() - t0, False)
+        return None
+
+
+def _dashboard_client(base: str, rec: _Recorder, stop: threading.Event,
+                      think_s: float, seed: int) -> None:
+    """Один «дашборд»: тот же набор запросов, что делает front/main.html."""
+    rnd  = random.Random(seed)
+    http = requests.Session()
+    tickers: list[str] = []
+    while not stop.is_set():
+        resp = _timed(rec, http, "GET", f"{base}/api/table", "GET /api/table")
+        if resp is not None and resp.ok:
+            tickers = resp.json().get("tickers") or tickers
+        _timed(rec, http, "GET", f"{base}/api/auto-order", "GET /api/auto-order")
+        if tickers:
+            sym = rnd.choice(tickers)
+            iv  = rnd.choice((1, 15))
+            _timed(rec, http, "GET", f"{base}/api/ticker/{sym}?interval={iv}",
+                   f"GET /api/ticker/{{symbol}}?interval={iv}")
+        _timed(rec, http, "GET", f"{base}/api/overbought", "GET /api/overbought")
+        if rnd.random() < 0.1:
+            _timed(rec, http, "GET", f"{base}/api/instruments", "GET /api/instruments")
+        stop.wait(rnd.uniform(0.5, 1.5) * think_s)
+
+
+def _scan_driver(base: str, rec: _Recorder, stop: threading.Event, every_s: float) -> None:
+    """Периодически запускает run_scan через POST /api/overbought/scan."""
+    http = requests.Session()
+    while not stop.is_set():
+        _timed(rec, http, "POST", f"{base}/api/overbought/scan", "POST /api/overbought/scan")
+        stop.wait(every_s)
+
+
+def _start_mock(args) -> tuple[object, threading.Thread]:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        mock_bybit.create_app(mock_bybit.config_from_args(args)),
+        host="127.0.0.1", port=args.mock_port, log_level="warning",
+    ))
+    thread = threading.Thread(target=server.run, name="mock-bybit", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _start_app(args) -> subprocess.Popen:
+    env = {**os.environ, "BYBIT_ENDPOINT": f"http://127.0.0.1:{args.mock_port}"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "crypt.main:app",
+         "--host", "127.0.0.1", "--port", str(args.app_port), "--log-level", "warning"],
+        cwd=_ROOT, env=env,
+    )
+
+
+def _wait_ready(base: str, timeout_s: float) -> dict:
+    """Ждёт /healthz и затем /readyz; возвращает тайминги старта."""
+    t0 = time.perf_counter()
+    first = ready = None
+    while time.perf_counter() - t0 < timeout_s:
+        try:
+            if first is None and requests.get(f"{base}/healthz", timeout=1).ok:
+                first = time.perf_counter() - t0
+            if first is not None and requests.get(f"{base}/readyz", timeout=1).status_code == 200:
+                ready = time.perf_counter() - t0
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return {"first_response_s": first, "ready_s": ready}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test crypt.main against a mock Bybit")
+    parser.add_argument("--clients",    type=int,   default=10, help="simulated dashboards")
+    parser.add_argument("--duration",   type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--think-ms",   type=float, default=1000.0, help="pause between dashboard polls")
+    parser.add_argument("--scan-every", type=float, default=30.0, help="seconds between scan triggers")
+    parser.add_argument("--app-url",    default=None, help="use an already running app instead of spawning one")
+    parser.add_argument("--app-port",   type=int,   default=8765)
+    parser.add_argument("--mock-port",  type=int,   default=8800)
+    parser.add_argument("--no-mock",    action="store_true", help="do not start the mock server")
+    parser.add_argument("--json",       type=Path,  default=None, help="write the summary here")
+    mock_bybit.add_arguments(parser)
+    args = parser.parse_args()
+
+    base = (args.app_url or f"http://127.0.0.1:{args.app_port}").rstrip("/")
+    mock = None
+    app  = None
+    if not args.no_mock:
+        mock, _ = _start_mock(args)
+    if args.app_url is None:
+        app = _start_app(args)
+
+    try:
+        startup = _wait_ready(base, timeout_s=120)
+        print(f"startup: first response {startup['first_response_s']}s, ready {startup['ready_s']}s")
+
+        rec  = _Recorder()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=_dashboard_client, args=(base, rec, stop, args.think_ms / 1000, i),
+                             name=f"client-{i}", daemon=True)
+            for i in range(args.clients)
+        ]
+        threads.append(threading.Thread(target=_scan_driver, args=(base, rec, stop, args.scan_every),
+                                        name="scan", daemon=True))
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=30)
+        elapsed = time.perf_counter() - t0
+
+        summary = rec.summary(elapsed)
+        print(f"\n{'endpoint':<42}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for ep, s in summary.items():
+            print(f"{ep:<42}{s['count']:>8}{s['errors']:>6}{s['rps']:>9}"
+                  f"{s['p50_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+        total = sum(s["count"] for s in summary.values())
+        print(f"\ntotal: {total} requests in {elapsed:.1f}s = {total / elapsed:.1f} rps, {args.clients} clients")
+
+        upstream = None
+        if mock is not None:
+            upstream = requests.get(f"http://127.0.0.1:{args.mock_port}/mock/stats", timeout=5).json()
+            print(f"mock bybit: {sum(upstream['requests'].values())} requests, "
+                  f"{sum(upstream['rate_limited'].values())} rate-limited, "
+                  f"{sum(upstream['errors'].values())} errors, {upstream['orders']} orders")
+
+        if args.json:
+            args.json.write_text(json.dumps({
+                "args":      {k: str(v) for k, v in vars(args).items()},
+                "startup":   startup,
+                "elapsed_s": round(elapsed, 2),
+                "endpoints": summary,
+                "upstream":  upstream,
+            }, indent=2), encoding="utf-8")
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait(timeout=10)
+        if mock is not None:
+            mock.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
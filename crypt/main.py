@@ -1,33 +1,131 @@
-import asyncio
-import logging
 import time
-from contextlib import asynccontextmanager
-from dataclasses import asdict
-from pathlib import Path
 
-from fastapi import Body, FastAPI, Request
-from fastapi.templating import Jinja2Templates
-
-import crypt.monitor as monitor
-import crypt.overbought as overbought
-from crypt.bit import session as bybit_session
-from crypt.orders_bit import place_short_order
-from crypt.config import TICKERS, LONG_TICKERS, OVERBOUGHT_THRESHOLDS, ShortCriteria, LongCriteria
+# first statement: the startup budget must include the import cost below
+_IMPORT_TS = time.monotonic()
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import secrets  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+from dataclasses import asdict  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from fastapi import Body, FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+from fastapi.templating import Jinja2Templates  # noqa: E402
+
+import crypt.monitor as monitor  # noqa: E402
+import crypt.order_queue as order_queue  # noqa: E402
+import crypt.order_tracker as order_tracker  # noqa: E402
+import crypt.overbought as overbought  # noqa: E402
+import crypt.profiler as profiler  # noqa: E402
+from crypt.bit import get_session  # noqa: E402
+from crypt.orders_bit import ensure_leverage_many, place_short_order  # noqa: E402
+from crypt.config import ADMIN_TOKEN, TICKERS, LONG_TICKERS, OVERBOUGHT_THRESHOLDS, ShortCriteria, LongCriteria  # noqa: E402
 
 templates = Jinja2Templates(directory=Path(__file__).parent.parent / "front")
 
 
+_STARTUP_BUDGET = 1.0            # seconds from import until requests can be served
+startup_s:        float | None = None   # import → lifespan ready to serve
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _warm_up() -> None:
+    """Fill caches in the background, then hand over to the periodic monitor."""
+    await asyncio.gather(monitor.refresh_tables(), _refresh_instruments())
+    logging.info("Warm-up done in %.2fs", time.monotonic() - _IMPORT_TS)
+    await monitor.table_monitor()
+
+
+async def _preset_leverage(symbols: list[str]) -> None:
+    """Apply auto-order leverage up front so the first signal goes straight out."""
+    try:
+        await asyncio.to_thread(ensure_leverage_many, symbols)
+    except Exception as e:
+        logging.warning("Leverage preset failed for %s: %s", symbols, e)
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    # Only cheap local reads here: serve the persisted snapshot at once and
+    # let the first Bybit refresh run in the background (see /readyz).
     monitor._load_auto_order_state()
-    await monitor.refresh_tables()
-    asyncio.create_task(monitor.table_monitor())
+    monitor._load_table_snapshot()
+    for coro in (
+        _warm_up(),
+        order_queue.dispatcher(),
+        order_tracker.start(),
+        _preset_leverage(sorted(monitor._auto_order_tickers)),
+    ):
+        _spawn(coro)
+    global startup_s
+    startup_s = time.monotonic() - _IMPORT_TS
+    log = logging.warning if startup_s > _STARTUP_BUDGET else logging.info
+    log("Serving after %.3fs (budget %.1fs)", startup_s, _STARTUP_BUDGET)
     yield
+    order_tracker.stop()
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+_UNPROFILED_PREFIXES = ("/api/admin/", "/api/orders/stream")   # admin calls; SSE never ends
+
+
+class _ProfileRequests:
+    """Plain ASGI middleware: a single dict check per request unless profiling is armed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.armed or scope["type"] != "http" or scope["path"].startswith(_UNPROFILED_PREFIXES):
+            return await self.app(scope, receive, send)
+        with profiler.maybe("request", scope["path"]):
+            await self.app(scope, receive, send)
+
+
+app.add_middleware(_ProfileRequests)
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and the event loop answers."""
+    return {
+        "status":    "ok",
+        "uptime_s":  round(time.monotonic() - _IMPORT_TS, 3),
+        "startup_s": round(startup_s, 3) if startup_s is not None else None,
+    }
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once a refresh returned fresh data, 503 while warming up."""
+    if monitor.warmed_up:
+        phase = "ready"
+    elif monitor.snapshot_loaded:
+        phase = "serving_snapshot"
+    else:
+        phase = "cold"
+    body = {
+        "ready":       monitor.warmed_up,
+        "phase":       phase,
+        "refresh":     monitor.refresh_progress,
+        "updated_at":  monitor.table_updated_at,
+        "instruments": _instruments_cache is not None,
+    }
+    return JSONResponse(body, status_code=200 if monitor.warmed_up else 503)
+
+
 @app.get("/")
 async def root(request: Request):
     return templates.TemplateResponse(request=request, name="main.html", context={})
@@ -94,27 +192,34 @@ _instruments_cache_ts: float = 0.0
 _INSTRUMENTS_TTL = 3600.0
 
 
+async def _refresh_instruments() -> str | None:
+    """Reload the instruments cache from Bybit. Returns an error message on failure."""
+    global _instruments_cache, _instruments_cache_ts
+    now = time.time()
+    try:
+        raw_inst, raw_tick = await asyncio.gather(
+            asyncio.to_thread(lambda: get_session().get_instruments_info(category="linear")),
+            asyncio.to_thread(lambda: get_session().get_tickers(category="linear")),
+        )
+        funding = {t["symbol"]: t.get("fundingRate") for t in raw_tick["result"]["list"]}
+        instruments = raw_inst["result"]["list"]
+        for inst in instruments:
+            inst["fundingRate"] = funding.get(inst["symbol"])
+        _instruments_cache = instruments
+        _instruments_cache_ts = now
+        return None
+    except Exception as e:
+        logging.error("get_instruments failed: %s", e)
+        return str(e)
+
+
 @app.get("/api/instruments")
 async def get_instruments():
     """Return all linear perpetual instruments from Bybit with funding rate (cached 1 h)."""
-    global _instruments_cache, _instruments_cache_ts
-    now = time.time()
-    if _instruments_cache is None or now - _instruments_cache_ts > _INSTRUMENTS_TTL:
-        try:
-            raw_inst, raw_tick = await asyncio.gather(
-                asyncio.to_thread(lambda: bybit_session.get_instruments_info(category="linear")),
-                asyncio.to_thread(lambda: bybit_session.get_tickers(category="linear")),
-            )
-            funding = {t["symbol"]: t.get("fundingRate") for t in raw_tick["result"]["list"]}
-            instruments = raw_inst["result"]["list"]
-            for inst in instruments:
-                inst["fundingRate"] = funding.get(inst["symbol"])
-            _instruments_cache = instruments
-            _instruments_cache_ts = now
-        except Exception as e:
-            logging.error("get_instruments failed: %s", e)
-            if _instruments_cache is None:
-                return {"error": str(e), "instruments": [], "count": 0}
+    if _instruments_cache is None or time.time() - _instruments_cache_ts > _INSTRUMENTS_TTL:
+        error = await _refresh_instruments()
+        if error and _instruments_cache is None:
+            return {"error": error, "instruments": [], "count": 0}
     return {"instruments": _instruments_cache, "count": len(_instruments_cache)}
 
 
@@ -130,46 +235,59 @@ def _trading_symbols() -> list[str]:
     ]
 
 
+async def _scan_symbols() -> list[str]:
+    """Символы для скана: из кэша инструментов, иначе напрямую из Bybit."""
+    symbols = _trading_symbols()
+    if symbols:
+        return symbols
+    raw = await asyncio.to_thread(
+        lambda: get_session().get_instruments_info(category="linear")
+    )
+    return [
+        i["symbol"] for i in raw["result"]["list"]
+        if i.get("quoteCoin") == "USDT"
+        and i.get("contractType") == "LinearPerpetual"
+        and i.get("status") == "Trading"
+    ]
+
+
 @app.get("/api/overbought")
-async def get_overbought():
-    """Вернуть текущее состояние сканирования и дефолтные пороги из конфига."""
-    return {
-        "state":      overbought.state,
-        "updated_at": overbought.updated_at,
-        "is_scanning": overbought.is_scanning,
-        "defaults":   OVERBOUGHT_THRESHOLDS,
-    }
+async def get_overbought(since: int | None = None):
+    """Вернуть текущее состояние сканирования и дефолтные пороги из конфига.
+
+    since — версия, уже имеющаяся у клиента; если она не изменилась,
+    возвращается только прогресс без state, и такой опрос не считается
+    чтением (не продлевает авто-обновление скана).
+    """
+    snap = overbought.snapshot(reader=False)
+    if since is not None and since == snap["version"]:
+        snap.pop("state")
+        return {**snap, "unchanged": True}
+    overbought.mark_read()
+    return {**snap, "defaults": OVERBOUGHT_THRESHOLDS}
 
 
 @app.post("/api/overbought/scan")
 async def trigger_overbought_scan():
-    """Запустить сканирование RSI 1D/4H/1H/1m. Если кэш свежий — вернуть его сразу."""
+    """Запустить сканирование RSI 1D/4H/1H/1m. Если кэш свежий — вернуть его сразу.
+
+    Во время скана (и при устаревшем кэше) возвращается прошлый снимок с
+    прогрессом, так что экран не пустеет; дальше скан обновляется сам.
+    """
     if overbought.is_cache_fresh():
-        return {
-            "status":     "cached",
-            "state":      overbought.state,
-            "updated_at": overbought.updated_at,
-        }
+        overbought.ensure_auto_refresh(_scan_symbols)
+        return {"status": "cached", **overbought.snapshot()}
     if overbought.is_scanning:
-        return {"status": "already_scanning"}
+        return {"status": "already_scanning", **overbought.snapshot()}
 
-    symbols = _trading_symbols()
-    if not symbols:
-        try:
-            raw = await asyncio.to_thread(
-                lambda: bybit_session.get_instruments_info(category="linear")
-            )
-            symbols = [
-                i["symbol"] for i in raw["result"]["list"]
-                if i.get("quoteCoin") == "USDT"
-                and i.get("contractType") == "LinearPerpetual"
-                and i.get("status") == "Trading"
-            ]
-        except Exception as e:
-            return {"error": str(e)}
+    try:
+        symbols = await _scan_symbols()
+    except Exception as e:
+        return {"error": str(e)}
 
     asyncio.create_task(overbought.run_scan(symbols))
-    return {"status": "started", "count": len(symbols)}
+    overbought.ensure_auto_refresh(_scan_symbols)
+    return {"status": "started", "count": len(symbols), **overbought.snapshot()}
 
 
 @app.get("/api/auto-order")
@@ -188,6 +306,43 @@ async def add_monitor_tickers(symbols: list[str] = Body(...)):
     return {**result, "total": len(monitor.TABLE_TICKERS)}
 
 
+@app.get("/api/orders/log")
+async def get_order_log(limit: int = 50):
+    """Recent auto-orders with queue / round-trip latency and exchange result."""
+    return {
+        "stats":  order_queue.stats(),
+        "orders": [
+            {**e, "status": order_tracker.order_status(e.get("orderId"))}
+            for e in list(order_queue.order_log)[-limit:][::-1]
+        ],
+    }
+
+
+_ORDERS_KEEPALIVE = 15.0   # seconds between SSE keep-alive comments
+
+
+@app.get("/api/orders")
+async def get_orders():
+    """Order / position book maintained from Bybit's private WebSocket streams."""
+    return order_tracker.snapshot()
+
+
+@app.get("/api/orders/stream")
+async def stream_orders(request: Request):
+    """Server-sent events: the full book on connect and after every change."""
+    async def events():
+        seen = -1
+        while not await request.is_disconnected():
+            if order_tracker.version != seen:
+                snap = order_tracker.snapshot()
+                seen = snap["version"]
+                yield f"data: {json.dumps(snap)}\n\n"
+            elif not await order_tracker.wait_for_change(seen, _ORDERS_KEEPALIVE):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/api/auto-order/{symbol}")
 async def set_auto_order(symbol: str, enabled: bool):
     """Enable or disable auto-order for a ticker."""
@@ -195,8 +350,75 @@ async def set_auto_order(symbol: str, enabled: bool):
         return {"error": f"Unknown ticker: {symbol}"}
     if enabled:
         monitor._auto_order_tickers.add(symbol)
+        _spawn(_preset_leverage([symbol]))
     else:
         monitor._auto_order_tickers.discard(symbol)
     monitor._save_auto_order_state()
     logging.info("Auto-order %s: %s", symbol, "ON" if enabled else "OFF")
     return {"symbol": symbol, "enabled": symbol in monitor._auto_order_tickers}
+
+
+# --- Admin: on-demand profiling ---
+
+def _admin_denied(request: Request) -> JSONResponse | None:
+    """403 unless ADMIN_TOKEN is configured and sent as X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        return JSONResponse({"error": "Admin endpoints disabled; set ADMIN_TOKEN"}, status_code=403)
+    if not secrets.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    return None
+
+
+@app.get("/api/admin/profile")
+async def get_profile_status(request: Request):
+    """Armed targets and recent profiling runs with their top 5 functions."""
+    if denied := _admin_denied(request):
+        return denied
+    return profiler.status()
+
+
+@app.post("/api/admin/profile")
+async def arm_profiler(
+    request:  Request,
+    target:   str   = "refresh",
+    count:    int   = 1,
+    mode:     str   = "deterministic",
+    interval: float = 0.005,
+    match:    str   = "",
+):
+    """Profile the next *count* refresh cycles, scans or API requests.
+
+    mode=deterministic writes cProfile .prof files, mode=sampling writes
+    collapsed stacks (.folded) for flame graphs; see crypt/profiler.py.
+    """
+    if denied := _admin_denied(request):
+        return denied
+    try:
+        cfg = profiler.arm(target, count, mode, interval, match)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"target": target, **cfg}
+
+
+@app.delete("/api/admin/profile")
+async def disarm_profiler(request: Request, target: str | None = None):
+    """Cancel armed profiling for one target, or all of them."""
+    if denied := _admin_denied(request):
+        return denied
+    profiler.disarm(target)
+    return {"armed": profiler.armed}
+
+
+@app.get("/api/admin/profile/{run_id}")
+async def get_profile_run(request: Request, run_id: str, sort: str = "self_s", limit: int = 30):
+    """Top functions of one profiling run by self or total time."""
+    if denied := _admin_denied(request):
+        return denied
+    run = profiler.find_run(run_id)
+    if run is None:
+        return JSONResponse({"error": f"Unknown run: {run_id}"}, status_code=404)
+    try:
+        functions = profiler.top(run, sort, limit)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {**{k: v for k, v in run.items() if k != "functions"}, "functions": functions}
@@ -0,0 +1,494 @@
+"""
+Локальная замена Bybit v5 REST для нагрузочных тестов.
+
+Обслуживает те эндпоинты, которые использует проект:
+ - GET  /v5/market/kline, /v5/market/index-price-kline
+ - GET  /v5/market/tickers
+ - GET  /v5/market/instruments-info
+ - POST /v5/order/create, /v5/order/create-batch
+ - POST /v5/position/set-leverage
+ - GET  /v5/order/realtime, /v5/position/list
+ - WS   /v5/private — потоки order / execution / position
+
+Свечи воспроизводят цены закрытия из записанного ответа (data.json) с
+актуальными метками времени, поэтому любой symbol / interval / limit / start /
+end получает правдоподобный и детерминированный ряд: одна и та же свеча
+всегда имеет одну и ту же цену, страницы пагинации согласованы между собой.
+
+Задержка, доля ошибок и лимит запросов настраиваются (см. MockConfig).
+Каждый созданный ордер проигрывается в приватный поток: New, через
+fill_delay_ms — Filled + execution + позиция, через close_after_ms (если > 0) —
+срабатывание TP или SL и закрытие позиции.
+
+Запуск:
+    python -m crypt.mock_bybit --port 8800 --latency-ms 80 --error-rate 0.01 --rate-limit 50
+    BYBIT_ENDPOINT=http://127.0.0.1:8800 uvicorn crypt.main:app
+"""
+import argparse
+import ast
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from crypt.config import TICKERS
+
+_RECORDING = Path(__file__).parent.parent / "data.json"
+
+_INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000,
+    "720": 43_200_000, "D": 86_400_000, "W": 604_800_000, "M": 2_592_000_000,
+}
+_KLINE_MAX_LIMIT       = 1000
+_INSTRUMENTS_MAX_LIMIT = 1000
+
+# Bybit retCodes, которые обрабатывает pybit
+RET_RATE_LIMIT   = 10006
+RET_SERVER_ERROR = 10016
+RET_LEVERAGE_SET = 110043
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0      # базовая задержка каждого ответа
+    jitter_ms:  float = 0.0      # ± равномерный разброс поверх latency_ms
+    error_rate: float = 0.0      # доля запросов, отвечающих retCode 10016
+    rate_limit: float = 0.0      # запросов в секунду на весь сервер, 0 — без лимита
+    universe:   int   = 500      # число LinearPerpetual-символов в instruments-info
+    recording:  Path  = _RECORDING
+    seed:       int | None = None
+    fill_delay_ms:  float = 200.0   # New → Filled в приватном потоке
+    close_after_ms: float = 0.0     # Filled → TP/SL; 0 — позиция остаётся открытой
+    close_as:       str   = "tp"    # "tp" или "sl"
+
+
+@dataclass
+class MockStats:
+    """Счётчики, доступные через GET /mock/stats."""
+    requests:     Counter = field(default_factory=Counter)
+    errors:       Counter = field(default_factory=Counter)
+    rate_limited: Counter = field(default_factory=Counter)
+    orders:       list    = field(default_factory=list)
+
+
+def load_recording(path: Path) -> list[float]:
+    """Return recorded close prices, oldest → newest.
+
+    data.json is a printed pybit response (Python repr, not strict JSON),
+    so both formats are accepted.
+    """
+    text = path.read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = ast.literal_eval(text)
+    rows = data["result"]["list"]
+    return [float(r[4]) for r in reversed(rows)]
+
+
+class _RateLimiter:
+    """Token bucket на весь сервер; rate <= 0 отключает лимит."""
+
+    def __init__(self, rate: float):
+        self.rate   = rate
+        self.tokens = rate
+        self.ts     = time.monotonic()
+        self.lock   = threading.Lock()
+
+    def acquire(self) -> tuple[bool, int]:
+        """Return (allowed, reset_ts_ms)."""
+        if self.rate <= 0:
+            return True, 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.ts) * self.rate)
+            self.ts = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True, 0
+            wait_s = (1 - self.tokens) / self.rate
+            return False, int((time.time() + wait_s) * 1000)
+
+
+def _symbols(universe: int) -> list[str]:
+    syms = list(TICKERS)
+    i = 0
+    while len(syms) < universe:
+        syms.append(f"MOCK{i:03d}USDT")
+        i += 1
+    return syms[:max(universe, len(TICKERS))]
+
+
+def _envelope(result, ret_code: int = 0, ret_msg: str = "OK") -> dict:
+    return {
+        "retCode":    ret_code,
+        "retMsg":     ret_msg,
+        "result":     result,
+        "retExtInfo": {},
+        "time":       int(time.time() * 1000),
+    }
+
+
+def create_app(config: MockConfig | None = None) -> FastAPI:
+    """Build the mock FastAPI app. Its MockStats is available as app.state.stats."""
+    config  = config or MockConfig()
+    closes  = load_recording(config.recording)
+    symbols = _symbols(config.universe)
+    limiter = _RateLimiter(config.rate_limit)
+    rnd     = random.Random(config.seed)
+    stats   = MockStats()
+    leverage_set: set[str] = set()
+    open_orders:  dict[str, dict] = {}
+    positions:    dict[str, dict] = {}
+    ws_clients:   set[asyncio.Queue] = set()
+    sim_tasks:    set[asyncio.Task]  = set()   # сильные ссылки: loop держит задачи лишь слабо
+
+    app = FastAPI(title="mock-bybit")
+    app.state.config = config
+    app.state.stats  = stats
+
+    def _scale(symbol: str) -> float:
+        # разные символы — разный уровень цен, но одна и та же форма ряда
+        return (zlib.crc32(symbol.encode()) % 10_000 + 1) / closes[-1]
+
+    def _price(symbol: str, ts_ms: int, step_ms: int) -> float:
+        shift = zlib.crc32(symbol.encode()) % len(closes)
+        return closes[(ts_ms // step_ms + shift) % len(closes)] * _scale(symbol)
+
+    def _kline_rows(symbol: str, interval: str, limit: int,
+                    start: int | None, end: int | None, index_price: bool) -> list[list[str]]:
+        step  = _INTERVAL_MS[interval]
+        now   = int(time.time() * 1000)
+        last  = (min(end, now) if end else now) // step * step
+        rows  = []
+        ts    = last
+        while len(rows) < limit and (start is None or ts >= start):
+            close = _price(symbol, ts, step)
+            open_ = _price(symbol, ts - step, step)
+            row = [str(ts), f"{open_:.6g}", f"{max(open_, close):.6g}",
+                   f"{min(open_, close):.6g}", f"{close:.6g}"]
+            if not index_price:
+                row += ["1000", f"{1000 * close:.6g}"]
+            rows.append(row)
+            ts -= step
+        return rows   # newest first, как у Bybit
+
+    def _push(topic: str, rows: list[dict]) -> None:
+        msg = {"id": str(uuid.uuid4()), "topic": topic,
+               "creationTime": int(time.time() * 1000), "data": rows}
+        for q in ws_clients:
+            q.put_nowait(msg)
+
+    def _order_row(order: dict, status: str, **extra) -> dict:
+        now = str(int(time.time() * 1000))
+        return {
+            "category":      "linear",
+            "orderId":       order["orderId"],
+            "orderLinkId":   order.get("orderLinkId", ""),
+            "symbol":        order["symbol"],
+            "side":          order.get("side", "Sell"),
+            "orderType":     order.get("orderType", "Limit"),
+            "orderStatus":   status,
+            "price":         order.get("price", "0"),
+            "qty":           order.get("qty", "0"),
+            "cumExecQty":    order.get("qty", "0") if status == "Filled" else "0",
+            "avgPrice":      order.get("price", "0") if status == "Filled" else "",
+            "takeProfit":    order.get("takeProfit", ""),
+            "stopLoss":      order.get("stopLoss", ""),
+            "stopOrderType": "",
+            "createdTime":   str(order["ts"]),
+            "updatedTime":   now,
+            **extra,
+        }
+
+    def _execution(order_id: str, symbol: str, side: str, price: str, qty: str) -> dict:
+        return {
+            "category": "linear", "execId": str(uuid.uuid4()), "orderId": order_id,
+            "symbol": symbol, "side": side, "execPrice": price, "execQty": qty,
+            "execType": "Trade", "execTime": str(int(time.time() * 1000)),
+        }
+
+    async def _simulate(order: dict) -> None:
+        """Проиграть жизненный цикл ордера в приватный поток."""
+        sym = order["symbol"]
+        row = _order_row(order, "New")
+        open_orders[order["orderId"]] = row
+        _push("order", [row])
+
+        await asyncio.sleep(config.fill_delay_ms / 1000)
+        open_orders.pop(order["orderId"], None)
+        _push("order", [_order_row(order, "Filled")])
+        _push("execution", [_execution(order["orderId"], sym, row["side"], row["price"], row["qty"])])
+        positions[sym] = {
+            "category": "linear", "symbol": sym, "side": row["side"], "size": row["qty"],
+            "avgPrice": row["price"], "markPrice": row["price"], "takeProfit": row["takeProfit"],
+            "stopLoss": row["stopLoss"], "leverage": "1", "unrealisedPnl": "0",
+            "updatedTime": str(int(time.time() * 1000)),
+        }
+        _push("position", [positions[sym]])
+
+        if config.close_after_ms <= 0:
+            return
+        await asyncio.sleep(config.close_after_ms / 1000)
+        is_tp = config.close_as == "tp"
+        price = row["takeProfit"] if is_tp else row["stopLoss"]
+        close = {**order, "orderId": str(uuid.uuid4()), "side": "Buy", "orderType": "Market",
+                 "price": price, "ts": int(time.time() * 1000)}
+        _push("order", [_order_row(close, "Filled", stopOrderType="TakeProfit" if is_tp else "StopLoss")])
+        _push("execution", [_execution(close["orderId"], sym, "Buy", price, row["qty"])])
+        positions.pop(sym, None)
+        _push("position", [{"category": "linear", "symbol": sym, "side": "", "size": "0",
+                            "updatedTime": str(int(time.time() * 1000))}])
+
+    def _accept_order(item: dict) -> str:
+        order_id = str(uuid.uuid4())
+        order    = {**item, "orderId": order_id, "ts": int(time.time() * 1000)}
+        stats.orders.append(order)
+        task = asyncio.create_task(_simulate(order))
+        sim_tasks.add(task)
+        task.add_done_callback(sim_tasks.discard)
+        return order_id
+
+    @app.middleware("http")
+    async def _inject(request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/mock/"):
+            return await call_next(request)
+        stats.requests[path] += 1
+
+        delay = config.latency_ms + rnd.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        allowed, reset_ts = limiter.acquire()
+        headers = {
+            "X-Bapi-Limit":                 str(int(config.rate_limit) or 600),
+            "X-Bapi-Limit-Status":          "0" if not allowed else "1",
+            "X-Bapi-Limit-Reset-Timestamp": str(reset_ts or int(time.time() * 1000)),
+        }
+        if not allowed:
+            stats.rate_limited[path] += 1
+            return JSONResponse(
+                _envelope({}, RET_RATE_LIMIT, "Too many visits!"), headers=headers,
+            )
+        if config.error_rate and rnd.random() < config.error_rate:
+            stats.errors[path] += 1
+            return JSONResponse(
+                _envelope({}, RET_SERVER_ERROR, "Server error (mock)"), headers=headers,
+            )
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    def _kline(request: Request, index_price: bool) -> dict:
+        q        = request.query_params
+        symbol   = q.get("symbol", "BTCUSDT")
+        interval = q.get("interval", "1")
+        if interval not in _INTERVAL_MS:
+            return _envelope({}, 10001, f"Invalid interval: {interval}")
+        limit = min(int(q.get("limit", 200)), _KLINE_MAX_LIMIT)
+        start = int(q["start"]) if "start" in q else None
+        end   = int(q["end"])   if "end"   in q else None
+        return _envelope({
+            "category": q.get("category", "linear"),
+            "symbol":   symbol,
+            "list":     _kline_rows(symbol, interval, limit, start, end, index_price),
+        })
+
+    @app.get("/v5/market/kline")
+    async def kline(request: Request):
+        return _kline(request, index_price=False)
+
+    @app.get("/v5/market/index-price-kline")
+    async def index_price_kline(request: Request):
+        return _kline(request, index_price=True)
+
+    @app.get("/v5/market/tickers")
+    async def tickers(request: Request):
+        q    = request.query_params
+        want = q.get("symbol")
+        step = _INTERVAL_MS["1"]
+        now  = int(time.time() * 1000)
+        items = []
+        for sym in symbols:
+            if want and sym != want:
+                continue
+            price = f"{_price(sym, now // step * step, step):.6g}"
+            items.append({
+                "symbol":      sym,
+                "lastPrice":   price,
+                "indexPrice":  price,
+                "markPrice":   price,
+                "fundingRate": f"{(zlib.crc32(sym.encode()) % 200 - 100) / 1e6:.6f}",
+                "volume24h":   "1000000",
+            })
+        return _envelope({"category": q.get("category", "linear"), "list": items})
+
+    @app.get("/v5/market/instruments-info")
+    async def instruments_info(request: Request):
+        q      = request.query_params
+        limit  = min(int(q.get("limit", 500)), _INSTRUMENTS_MAX_LIMIT)
+        offset = int(q.get("cursor") or 0)
+        want   = q.get("symbol")
+        page   = [s for s in symbols if s == want] if want else symbols[offset:offset + limit]
+        items  = [
+            {
+                "symbol":        sym,
+                "contractType":  "LinearPerpetual",
+                "status":        "Trading",
+                "baseCoin":      sym.removesuffix("USDT"),
+                "quoteCoin":     "USDT",
+                "launchTime":    "1672531200000",
+                "priceFilter":   {"tickSize": "0.0001", "minPrice": "0.0001", "maxPrice": "1000000"},
+                "lotSizeFilter": {"minOrderQty": "0.1", "maxOrderQty": "1000000", "qtyStep": "0.1"},
+            }
+            for sym in page
+        ]
+        next_offset = offset + limit
+        return _envelope({
+            "category":       q.get("category", "linear"),
+            "list":           items,
+            "nextPageCursor": str(next_offset) if not want and next_offset < len(symbols) else "",
+        })
+
+    @app.post("/v5/order/create")
+    async def order_create(request: Request):
+        body     = await request.json()
+        order_id = _accept_order(body)
+        return _envelope({"orderId": order_id, "orderLinkId": body.get("orderLinkId", "")})
+
+    @app.post("/v5/order/create-batch")
+    async def order_create_batch(request: Request):
+        body   = await request.json()
+        placed = []
+        for item in body.get("request", []):
+            order_id = _accept_order(item)
+            placed.append({
+                "category":    body.get("category", "linear"),
+                "symbol":      item.get("symbol"),
+                "orderId":     order_id,
+                "orderLinkId": item.get("orderLinkId", ""),
+                "createAt":    str(int(time.time() * 1000)),
+            })
+        return {
+            **_envelope({"list": placed}),
+            "retExtInfo": {"list": [{"code": 0, "msg": "OK"} for _ in placed]},
+        }
+
+    @app.post("/v5/position/set-leverage")
+    async def set_leverage(request: Request):
+        body = await request.json()
+        key  = f"{body.get('symbol')}:{body.get('buyLeverage')}:{body.get('sellLeverage')}"
+        if key in leverage_set:
+            return _envelope({}, RET_LEVERAGE_SET, "leverage not modified")
+        leverage_set.add(key)
+        return _envelope({})
+
+    @app.get("/v5/order/realtime")
+    async def order_realtime():
+        return _envelope({"category": "linear", "list": list(open_orders.values()), "nextPageCursor": ""})
+
+    @app.get("/v5/position/list")
+    async def position_list():
+        return _envelope({"category": "linear", "list": list(positions.values()), "nextPageCursor": ""})
+
+    @app.websocket("/v5/private")
+    async def private_stream(ws: WebSocket):
+        """Bybit v5 private stream: auth / subscribe / ping + pushes."""
+        await ws.accept()
+        conn_id = str(uuid.uuid4())
+        queue: asyncio.Queue = asyncio.Queue()
+        topics: set[str] = set()
+
+        async def _sender():
+            while True:
+                msg = await queue.get()
+                if msg["topic"] in topics:
+                    await ws.send_json(msg)
+
+        sender = asyncio.create_task(_sender())
+        ws_clients.add(queue)
+        try:
+            while True:
+                req = await ws.receive_json()
+                op  = req.get("op")
+                if op == "ping":
+                    await ws.send_json({"success": True, "ret_msg": "pong", "conn_id": conn_id, "op": "ping"})
+                elif op == "auth":
+                    await ws.send_json({"success": True, "ret_msg": "", "op": "auth", "conn_id": conn_id})
+                elif op == "subscribe":
+                    topics.update(req.get("args", []))
+                    await ws.send_json({"success": True, "ret_msg": "", "op": "subscribe",
+                                        "req_id": req.get("req_id"), "conn_id": conn_id})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            ws_clients.discard(queue)
+            sender.cancel()
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {
+            "requests":     dict(stats.requests),
+            "errors":       dict(stats.errors),
+            "rate_limited": dict(stats.rate_limited),
+            "orders":       len(stats.orders),
+        }
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register MockConfig options on *parser* (shared with crypt.loadtest)."""
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms",  type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests per second, 0 = unlimited")
+    parser.add_argument("--universe",   type=int,   default=500)
+    parser.add_argument("--recording",  type=Path,  default=_RECORDING)
+    parser.add_argument("--seed",       type=int,   default=None)
+    parser.add_argument("--fill-delay-ms",  type=float, default=200.0)
+    parser.add_argument("--close-after-ms", type=float, default=0.0,
+                        help="fire TP/SL this long after the fill, 0 = never")
+    parser.add_argument("--close-as",       choices=("tp", "sl"), default="tp")
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        universe=args.universe,
+        recording=args.recording,
+        seed=args.seed,
+        fill_delay_ms=args.fill_delay_ms,
+        close_after_ms=args.close_after_ms,
+        close_as=args.close_as,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local mock of the Bybit v5 REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,33 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
+import crypt.order_queue as order_queue
+import crypt.profiler as profiler
 from crypt.bit import fetch_rsi_multi
 from crypt.config import TICKERS, LONG_TICKERS
-from crypt.orders_bit import place_short_order
 
 # --- Constants ---
 TABLE_TICKERS   = list(TICKERS.keys())
 INTERVAL_LIMITS = {1: 1000, 15: 110}
+_REFRESH_CONCURRENCY = 8    # simultaneous fetch_rsi_multi calls per refresh
+_refresh_lock = asyncio.Lock()   # one refresh_tables() at a time (monitor loop, warm-up, ticker changes)
 
 # --- Auto-order persistence ---
 _STATE_FILE = Path(__file__).parent / "auto_order_state.json"
 
+# --- Last refreshed tables, served immediately after a restart ---
+_SNAPSHOT_FILE = Path(__file__).parent / "table_snapshot.json"
+
 # --- Mutable state (access via `import crypt.monitor as monitor`) ---
 table_state:      dict    = {ticker: [] for ticker in TABLE_TICKERS}
 detail_state:     dict    = {ticker: {iv: [] for iv in INTERVAL_LIMITS} for ticker in TABLE_TICKERS}
 table_updated_at: str     = "—"
 
+# Warm-up / refresh progress (reported by /readyz)
+warmed_up:        bool    = False        # a refresh_tables() finished with fresh data
+snapshot_loaded:  bool    = False        # tables were restored from _SNAPSHOT_FILE
+refresh_progress: dict    = {"done": 0, "ok": 0, "total": 0, "running": False}
+
 _auto_order_tickers: set[str] = set()
 _placed_signal_keys: set[str] = set()
 _dynamic_tickers:    set[str] = set()   # tickers added from overbought scan (not from config)
@@ -77,6 +88,44 @@ def _save_auto_order_state() -> None:
         logging.warning("Could not save auto-order state: %s", e)
 
 
+# --- Table snapshot persistence ---
+
+def _load_table_snapshot() -> None:
+    """Restore table_state / detail_state from the last saved refresh.
+
+    Only tickers currently present in TABLE_TICKERS are restored; the data is
+    already formatted for the frontend, so it can be served as-is until the
+    first background refresh replaces it.
+    """
+    global table_updated_at, snapshot_loaded
+    if not _SNAPSHOT_FILE.exists():
+        return
+    try:
+        data = json.loads(_SNAPSHOT_FILE.read_text(encoding="utf-8"))
+    except Exception as e:
+        logging.warning("Could not load table snapshot: %s", e)
+        return
+    for ticker in TABLE_TICKERS:
+        if ticker in data.get("table", {}):
+            table_state[ticker] = data["table"][ticker]
+        for iv, rows in data.get("detail", {}).get(ticker, {}).items():
+            if int(iv) in INTERVAL_LIMITS:   # JSON keys are strings
+                detail_state[ticker][int(iv)] = rows
+    table_updated_at = data.get("updated_at", table_updated_at)
+    snapshot_loaded  = True
+    logging.info("Table snapshot loaded (updated_at=%s)", table_updated_at)
+
+
+def _save_table_snapshot(snapshot: dict) -> None:
+    # write-then-rename: a crash mid-write must not corrupt the startup snapshot
+    tmp = _SNAPSHOT_FILE.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+        tmp.replace(_SNAPSHOT_FILE)
+    except Exception as e:
+        logging.warning("Could not save table snapshot: %s", e)
+
+
 # --- Frontend data formatting ---
 
 def _fmt_multi(r: dict) -> dict:
@@ -102,47 +151,79 @@ def _fmt_multi(r: dict) -> dict:
 
 # --- Background refresh ---
 
+async def _refresh_one(ticker: str, interval: int, lim: int, sem: asyncio.Semaphore) -> None:
+    criteria      = TICKERS.get(ticker)
+    long_criteria = LONG_TICKERS.get(ticker)
+    try:
+        async with sem:
+            records = await asyncio.to_thread(
+                fetch_rsi_multi, ticker, criteria, long_criteria, interval, lim
+            )
+        if ticker not in TABLE_TICKERS:   # removed while fetching
+            return
+
+        if interval == 15:
+            table_state[ticker] = [
+                {
+                    "time":  r["time"].strftime("%Y-%m-%d %H:%M"),
+                    "price": r["price"],
+                    "rsi":   round(r["rsi_15m"], 2),
+                }
+                for r in records
+            ]
+
+            if ticker in _auto_order_tickers and records:
+                latest = records[-1]
+                if latest.get("is_short"):
+                    key = f"{ticker}:{latest['time'].strftime('%Y-%m-%d %H:%M')}"
+                    if key not in _placed_signal_keys:
+                        _placed_signal_keys.add(key)
+                        # placed by order_queue.dispatcher(); never awaited here
+                        order_queue.submit(ticker, latest["price"], key)
+
+        detail_state[ticker][interval] = [_fmt_multi(r) for r in reversed(records)]
+        refresh_progress["ok"] += 1
+
+    except Exception as e:
+        print(f"Table fetch error [{ticker} {interval}m]: {e}")
+    finally:
+        refresh_progress["done"] += 1
+
+
 async def refresh_tables() -> None:
-    global table_updated_at
-    for ticker in TABLE_TICKERS:
-        criteria      = TICKERS.get(ticker)
-        long_criteria = LONG_TICKERS.get(ticker)
-        for interval, lim in INTERVAL_LIMITS.items():
-            try:
-                records = await asyncio.to_thread(
-                    fetch_rsi_multi, ticker, criteria, long_criteria, interval, lim
-                )
-
-                if interval == 15:
-                    table_state[ticker] = [
-                        {
-                            "time":  r["time"].strftime("%Y-%m-%d %H:%M"),
-                            "price": r["price"],
-                            "rsi":   round(r["rsi_15m"], 2),
-                        }
-                        for r in records
-                    ]
-
-                    if ticker in _auto_order_tickers and records:
-                        latest = records[-1]
-                        if latest.get("is_short"):
-                            key = f"{ticker}:{latest['time'].strftime('%Y-%m-%d %H:%M')}"
-                            if key not in _placed_signal_keys:
-                                _placed_signal_keys.add(key)
-                                try:
-                                    result = await asyncio.to_thread(
-                                        place_short_order, ticker, latest["price"]
-                                    )
-                                    logging.info("Order placed for %s: %s", ticker, result)
-                                except Exception as oe:
-                                    logging.error("Order placement failed for %s: %s", ticker, oe)
-
-                detail_state[ticker][interval] = [_fmt_multi(r) for r in reversed(records)]
-
-            except Exception as e:
-                print(f"Table fetch error [{ticker} {interval}m]: {e}")
-
-    table_updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    """Refresh every table; overlapping calls run one after another.
+
+    refresh_progress belongs to the running call, so the ready / snapshot
+    decision below never mixes counts from two refreshes.
+    """
+    global table_updated_at, warmed_up
+    async with _refresh_lock:
+        refresh_progress.update(
+            done=0, ok=0, total=len(TABLE_TICKERS) * len(INTERVAL_LIMITS), running=True,
+        )
+        sem = asyncio.Semaphore(_REFRESH_CONCURRENCY)
+        with profiler.maybe("refresh"):
+            await asyncio.gather(*[
+                _refresh_one(ticker, interval, lim, sem)
+                for ticker in TABLE_TICKERS
+                for interval, lim in INTERVAL_LIMITS.items()
+            ])
+
+        refresh_progress["running"] = False
+        if not refresh_progress["ok"]:
+            # every fetch failed (Bybit unreachable?) — keep serving the old data
+            logging.warning("Table refresh got no data (%d fetches failed)", refresh_progress["done"])
+            return
+        table_updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        warmed_up = True
+        # Row lists are replaced, never mutated, so shallow copies are enough to
+        # serialise safely in a worker thread.
+        snapshot = {
+            "updated_at": table_updated_at,
+            "table":      dict(table_state),
+            "detail":     {t: dict(ivs) for t, ivs in detail_state.items()},
+        }
+        await asyncio.to_thread(_save_table_snapshot, snapshot)
 
 
 async def table_monitor() -> None:
@@ -0,0 +1,89 @@
+"""
+Очередь авто-ордеров: обнаружение сигнала отделено от отправки ордера.
+
+refresh_tables() только кладёт сигнал в очередь через submit() и сразу идёт
+дальше. dispatcher() отправляет ордер сразу, без окна ожидания; всё, что
+уже лежит в очереди к этому моменту, уходит вместе с ним одной
+place_batch_order (через place_short_orders_batch). Каждый батч — отдельная
+задача, так что медленный батч не задерживает следующий.
+
+Для каждого ордера пишется запись в order_log: время постановки в очередь,
+отправки и ответа, задержки и результат (см. GET /api/orders/log).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from crypt.orders_bit import BATCH_MAX, place_short_orders_batch
+
+_LOG_SIZE = 500
+
+# ── публичное состояние ────────────────────────────────────────────
+order_log: deque[dict] = deque(maxlen=_LOG_SIZE)
+
+_queue: asyncio.Queue = asyncio.Queue()
+_inflight: set[asyncio.Task] = set()
+
+
+def submit(symbol: str, price: float, signal_key: str) -> None:
+    """Поставить SHORT-ордер в очередь; не блокирует."""
+    _queue.put_nowait({
+        "symbol":     symbol,
+        "price":      price,
+        "signal_key": signal_key,
+        "queued_at":  time.time(),
+    })
+
+
+async def _send(batch: list[dict]) -> None:
+    sent_at = time.time()
+    try:
+        results = await asyncio.to_thread(
+            place_short_orders_batch, [(o["symbol"], o["price"]) for o in batch]
+        )
+    except Exception as e:
+        logging.error("Order batch failed: %s", e)
+        results = [{"ok": False, "orderId": None, "msg": str(e)}] * len(batch)
+    done_at = time.time()
+
+    for order, res in zip(batch, results):
+        entry = {
+            **order,
+            **res,
+            "sent_at":    sent_at,
+            "done_at":    done_at,
+            "queue_ms":   round((sent_at - order["queued_at"]) * 1000, 1),
+            "latency_ms": round((done_at - order["queued_at"]) * 1000, 1),
+            "batch_size": len(batch),
+        }
+        order_log.append(entry)
+        if res["ok"]:
+            logging.info("Order placed for %s in %.0f ms: %s",
+                         order["symbol"], entry["latency_ms"], res["orderId"])
+        else:
+            logging.error("Order placement failed for %s: %s", order["symbol"], res["msg"])
+
+
+async def dispatcher() -> None:
+    """Отправлять ордера сразу, захватывая в батч уже ждущие в очереди."""
+    while True:
+        batch = [await _queue.get()]
+        while len(batch) < BATCH_MAX and not _queue.empty():
+            batch.append(_queue.get_nowait())
+        task = asyncio.create_task(_send(batch))
+        _inflight.add(task)
+        task.add_done_callback(_inflight.discard)
+
+
+def stats() -> dict:
+    """Сводка по order_log для API."""
+    lat = sorted(e["latency_ms"] for e in order_log)
+    return {
+        "queued":   _queue.qsize(),
+        "inflight": len(_inflight),
+        "total":    len(order_log),
+        "failed":   sum(1 for e in order_log if not e["ok"]),
+        "p50_ms":   lat[len(lat) // 2] if lat else None,
+        "max_ms":   lat[-1] if lat else None,
+    }
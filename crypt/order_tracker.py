@@ -0,0 +1,287 @@
+"""
+Отслеживание ордеров и позиций через приватный WebSocket Bybit.
+
+Подписка на потоки order / execution / position (pybit WebSocket в своём
+потоке). Колбэки обновляют книгу в памяти: ордера по orderId, позиции по
+символу, последние исполнения. При старте книга один раз засевается из REST
+(открытые ордера и позиции), дальше — только события потока, без опроса.
+После каждого переподключения засев повторяется, чтобы подобрать исполнения
+и TP/SL, пропущенные, пока потока не было. Если подключиться не удалось или
+pybit бросил попытки, start() переподключается сам с нарастающей паузой.
+
+Читатели берут snapshot(); каждое изменение увеличивает version и будит
+wait_for_change() — на нём построен SSE-поток дашборда (/api/orders/stream).
+
+Адрес потока задаётся BYBIT_WS_ENDPOINT (по умолчанию выводится из
+BYBIT_ENDPOINT, так что mock_bybit работает без доп. настроек).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from crypt.bit import get_session
+from crypt.config import BYBIT_API_KEY, BYBIT_API_SECRET, BYBIT_WS_ENDPOINT
+
+_MAX_ORDERS     = 500    # сколько завершённых ордеров держать в книге
+_MAX_EXECUTIONS = 200
+_RECONNECT_MIN  = 1.0    # секунд до повторного подключения, удваивается до _RECONNECT_MAX
+_RECONNECT_MAX  = 60.0
+_WATCH_INTERVAL = 10.0   # как часто проверять, что поток жив
+
+_TERMINAL = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+_TP_TYPES = {"TakeProfit", "PartialTakeProfit"}
+_SL_TYPES = {"StopLoss", "PartialStopLoss", "TrailingStop"}
+
+_ORDER_FIELDS = (
+    "orderId", "orderLinkId", "symbol", "side", "orderType", "orderStatus",
+    "price", "qty", "cumExecQty", "avgPrice", "takeProfit", "stopLoss",
+    "stopOrderType", "rejectReason", "createdTime", "updatedTime",
+)
+_POSITION_FIELDS = (
+    "symbol", "side", "size", "avgPrice", "markPrice", "positionValue",
+    "unrealisedPnl", "cumRealisedPnl", "takeProfit", "stopLoss", "leverage",
+    "updatedTime",
+)
+
+# ── публичное состояние ────────────────────────────────────────────
+orders:     dict[str, dict] = {}
+positions:  dict[str, dict] = {}
+executions: deque[dict]     = deque(maxlen=_MAX_EXECUTIONS)
+outcomes:   deque[dict]     = deque(maxlen=_MAX_EXECUTIONS)   # срабатывания TP / SL
+version:    int             = 0
+last_event_at: float | None = None
+
+_lock    = threading.Lock()
+_ws      = None
+_stopping = False
+_loop:    asyncio.AbstractEventLoop | None = None
+_changed: asyncio.Event | None = None
+
+
+# ── обновление книги (вызывается из потока WebSocket) ──────────────
+
+def _ms(v) -> int | None:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bump() -> None:
+    """Увеличить version и разбудить ждущих (держать _lock)."""
+    global version, last_event_at
+    version += 1
+    last_event_at = time.time()
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_notify)
+
+
+def _notify() -> None:
+    """Разбудить всех текущих ждущих и завести новое событие (в event loop)."""
+    global _changed
+    if _changed is not None:
+        _changed.set()
+    _changed = asyncio.Event()
+
+
+def _prune_orders() -> None:
+    done = [o for o in orders.values() if o.get("orderStatus") in _TERMINAL]
+    for o in sorted(done, key=lambda o: _ms(o.get("updatedTime")) or 0)[:max(0, len(done) - _MAX_ORDERS)]:
+        orders.pop(o["orderId"], None)
+
+
+def apply_orders(rows: list[dict]) -> None:
+    now_ms = int(time.time() * 1000)
+    with _lock:
+        for row in rows:
+            if row.get("category", "linear") != "linear":
+                continue
+            rec = orders.setdefault(row["orderId"], {})
+            if (_ms(rec.get("updatedTime")) or 0) > (_ms(row.get("updatedTime")) or 0):
+                continue   # устаревшее событие (например, REST-засев после потока)
+            rec.update({k: row[k] for k in _ORDER_FIELDS if k in row})
+            rec["received_at"] = now_ms
+            upd = _ms(row.get("updatedTime"))
+            rec["lag_ms"] = now_ms - upd if upd else None
+
+            stop_type = row.get("stopOrderType", "")
+            if row.get("orderStatus") == "Filled" and (stop_type in _TP_TYPES or stop_type in _SL_TYPES):
+                outcomes.append({
+                    "symbol":   row.get("symbol"),
+                    "result":   "tp" if stop_type in _TP_TYPES else "sl",
+                    "price":    row.get("avgPrice"),
+                    "qty":      row.get("cumExecQty"),
+                    "orderId":  row["orderId"],
+                    "time":     upd,
+                })
+        _prune_orders()
+        _bump()
+
+
+def apply_executions(rows: list[dict]) -> None:
+    now_ms = int(time.time() * 1000)
+    with _lock:
+        for row in rows:
+            if row.get("category", "linear") != "linear":
+                continue
+            execution = {
+                "execId":    row.get("execId"),
+                "orderId":   row.get("orderId"),
+                "symbol":    row.get("symbol"),
+                "side":      row.get("side"),
+                "execPrice": row.get("execPrice"),
+                "execQty":   row.get("execQty"),
+                "execType":  row.get("execType"),
+                "execTime":  row.get("execTime"),
+                "lag_ms":    now_ms - _ms(row.get("execTime")) if _ms(row.get("execTime")) else None,
+            }
+            executions.append(execution)
+            if row.get("orderId") in orders:
+                orders[row["orderId"]]["last_exec_at"] = execution["execTime"]
+        _bump()
+
+
+def apply_positions(rows: list[dict]) -> None:
+    with _lock:
+        for row in rows:
+            if row.get("category", "linear") != "linear":
+                continue
+            sym = row["symbol"]
+            if float(row.get("size") or 0) == 0:
+                positions.pop(sym, None)
+            else:
+                positions[sym] = {k: row[k] for k in _POSITION_FIELDS if k in row}
+        _bump()
+
+
+def _on_order(message: dict) -> None:
+    apply_orders(message.get("data", []))
+
+
+def _on_execution(message: dict) -> None:
+    apply_executions(message.get("data", []))
+
+
+def _on_position(message: dict) -> None:
+    apply_positions(message.get("data", []))
+
+
+# ── чтение ─────────────────────────────────────────────────────────
+
+def order_status(order_id: str | None) -> str | None:
+    return orders.get(order_id, {}).get("orderStatus") if order_id else None
+
+
+def snapshot() -> dict:
+    """Копия книги для API / SSE."""
+    with _lock:
+        return {
+            "connected":     _ws is not None and _ws.is_connected(),
+            "version":       version,
+            "last_event_at": last_event_at,
+            "orders":        sorted(orders.values(), key=lambda o: _ms(o.get("updatedTime")) or 0, reverse=True),
+            "positions":     list(positions.values()),
+            "executions":    list(executions)[::-1],
+            "outcomes":      list(outcomes)[::-1],
+        }
+
+
+async def wait_for_change(since: int, timeout: float) -> bool:
+    """Дождаться version > since. False — по таймауту."""
+    event = _changed
+    if version > since:
+        return True
+    if event is None:   # трекер не запущен
+        await asyncio.sleep(timeout)
+        return False
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except TimeoutError:
+        pass
+    return version > since
+
+
+# ── жизненный цикл ─────────────────────────────────────────────────
+
+def _seed_from_rest() -> None:
+    """Засеять книгу открытыми ордерами и позициями (один раз при старте)."""
+    session = get_session()
+    try:
+        apply_orders(session.get_open_orders(category="linear", settleCoin="USDT")["result"]["list"])
+        apply_positions(session.get_positions(category="linear", settleCoin="USDT")["result"]["list"])
+    except Exception as e:
+        logging.warning("order_tracker: REST seed failed: %s", e)
+
+
+def _connect() -> None:
+    global _ws
+    from pybit.unified_trading import WebSocket
+
+    class _WebSocket(WebSocket):
+        def _connect(self, url):
+            # pybit вызывает _connect и при автоматическом переподключении
+            reconnect = getattr(self, "_was_connected", False)
+            super()._connect(BYBIT_WS_ENDPOINT or url)
+            self._was_connected = True
+            if reconnect:
+                logging.info("order_tracker: private stream reconnected, re-seeding")
+                threading.Thread(target=_seed_from_rest, name="order-tracker-seed", daemon=True).start()
+
+    ws = _WebSocket(
+        channel_type="private",
+        testnet=False,
+        api_key=BYBIT_API_KEY,
+        api_secret=BYBIT_API_SECRET,
+    )
+    try:
+        ws.order_stream(_on_order)
+        ws.execution_stream(_on_execution)
+        ws.position_stream(_on_position)
+    except Exception:
+        ws.exit()
+        raise
+    _ws = ws
+
+
+def _drop_ws() -> None:
+    global _ws
+    if _ws is not None:
+        _ws.exit()
+        _ws = None
+
+
+async def start() -> None:
+    """Держать приватный поток подключённым (pybit — в потоках, не блокируя event loop)."""
+    global _loop, _changed
+    _loop    = asyncio.get_running_loop()
+    _changed = asyncio.Event()
+    delay = _RECONNECT_MIN
+    dead_checks = 0
+    while not _stopping:
+        if _ws is None:
+            try:
+                await asyncio.to_thread(_connect)
+                await asyncio.to_thread(_seed_from_rest)
+                logging.info("order_tracker: private stream connected")
+                delay = _RECONNECT_MIN
+            except Exception as e:
+                logging.error("order_tracker: could not connect private stream (retry in %.0fs): %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_MAX)
+                continue
+        await asyncio.sleep(_WATCH_INTERVAL)
+        # нет соединения две проверки подряд — значит, и своё переподключение pybit
+        # не помогло (флагам exited / attempting_connection доверять нельзя)
+        dead_checks = dead_checks + 1 if _ws is not None and not _ws.is_connected() else 0
+        if dead_checks >= 2:
+            logging.warning("order_tracker: private stream is down, reconnecting")
+            dead_checks = 0
+            _drop_ws()
+
+
+def stop() -> None:
+    global _stopping
+    _stopping = True
+    _drop_ws()
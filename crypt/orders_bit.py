@@ -1,11 +1,15 @@
+import concurrent.futures
 import logging
 
-from crypt.bit import session
+from crypt.bit import get_session
 
 DEFAULT_NOTIONAL = 100.0
 DEFAULT_LEVERAGE = 1
 TP_PCT           = 0.02    # 2 % take-profit for short (price falls)
 SL_PCT           = 0.10    # 10 % stop-loss for short (price rises)
+BATCH_MAX        = 20      # Bybit place_batch_order limit for linear
+
+_leverage_set: dict[str, int] = {}   # symbol → leverage already applied in this process
 
 
 def _calc_qty(price: float, notional: float) -> str:
@@ -18,6 +22,56 @@ def _calc_qty(price: float, notional: float) -> str:
     return str(round(raw, 4))          # fallback
 
 
+def _short_order_params(
+    symbol: str, signal_price: float, tp_pct: float, sl_pct: float, notional: float,
+) -> dict:
+    """Return Bybit order fields for a SHORT Limit order with TP / SL."""
+    return {
+        "symbol":      symbol,
+        "side":        "Sell",
+        "orderType":   "Limit",
+        "price":       str(signal_price),
+        "qty":         _calc_qty(signal_price, notional),
+        "takeProfit":  str(round(signal_price * (1 - tp_pct), 6)),
+        "stopLoss":    str(round(signal_price * (1 + sl_pct), 6)),
+    }
+
+
+def _ensure_leverage(session, symbol: str, leverage: int) -> None:
+    """Set leverage before placing an order; skipped if already applied in this process."""
+    if _leverage_set.get(symbol) == leverage:
+        return
+    try:
+        session.set_leverage(
+            category="linear",
+            symbol=symbol,
+            buyLeverage=str(leverage),
+            sellLeverage=str(leverage),
+        )
+        _leverage_set[symbol] = leverage
+    except Exception as e:
+        # "leverage not modified" is a benign error if it's already set correctly
+        logging.debug("set_leverage %s x%s: %s", symbol, leverage, e)
+        if "110043" in str(e):
+            _leverage_set[symbol] = leverage
+
+
+def ensure_leverage_many(symbols, leverage: int = DEFAULT_LEVERAGE) -> None:
+    """Apply leverage to every symbol that still needs it, concurrently.
+
+    Called ahead of time (startup, auto-order enabled) so the first signal
+    after a restart does not pay a set_leverage round trip per symbol.
+    """
+    session = get_session()
+    todo    = [s for s in dict.fromkeys(symbols) if _leverage_set.get(s) != leverage]
+    if not todo:
+        return
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(todo), BATCH_MAX), thread_name_prefix="lev"
+    ) as pool:
+        list(pool.map(lambda s: _ensure_leverage(session, s, leverage), todo))
+
+
 def place_short_order(
     symbol: str,
     signal_price: float,
@@ -37,39 +91,64 @@ def place_short_order(
     notional     : order size in USDT (default 100)
     leverage     : futures leverage (default 1×)
     """
-    qty         = _calc_qty(signal_price, notional)
-    take_profit = round(signal_price * (1 - tp_pct), 6)
-    stop_loss   = round(signal_price * (1 + sl_pct), 6)
+    session = get_session()
+    params  = _short_order_params(symbol, signal_price, tp_pct, sl_pct, notional)
 
-    # Set leverage before placing the order
-    try:
-        session.set_leverage(
-            category="linear",
-            symbol=symbol,
-            buyLeverage=str(leverage),
-            sellLeverage=str(leverage),
-        )
-    except Exception as e:
-        # "leverage not modified" is a benign error if it's already set correctly
-        logging.debug("set_leverage %s x%s: %s", symbol, leverage, e)
+    _ensure_leverage(session, symbol, leverage)
 
     logging.info(
-        "Placing SHORT order: %s  price=%.6f  qty=%s  notional=%.2f  lev=%s×  TP=%.6f  SL=%.6f",
-        symbol, signal_price, qty, notional, leverage, take_profit, stop_loss,
+        "Placing SHORT order: %s  price=%.6f  qty=%s  notional=%.2f  lev=%s×  TP=%s  SL=%s",
+        symbol, signal_price, params["qty"], notional, leverage,
+        params["takeProfit"], params["stopLoss"],
     )
 
     result = session.place_order(
         category="linear",
-        symbol=symbol,
         isLeverage=1,
-        side="Sell",
-        orderType="Limit",
         orderFilter="Order",
-        price=str(signal_price),
-        qty=qty,
-        takeProfit=str(take_profit),
-        stopLoss=str(stop_loss),
+        **params,
     )
 
     logging.info("place_order response: %s", result)
     return result
+
+
+def place_short_orders_batch(
+    orders: list[tuple[str, float]],
+    tp_pct: float   = TP_PCT,
+    sl_pct: float   = SL_PCT,
+    notional: float = DEFAULT_NOTIONAL,
+    leverage: int   = DEFAULT_LEVERAGE,
+) -> list[dict]:
+    """Place several SHORT Limit orders with as few round trips as possible.
+
+    orders — [(symbol, signal_price), ...]. Orders are sent through
+    place_batch_order in chunks of BATCH_MAX. Returns one dict per input
+    order, in order: {"ok": bool, "orderId": str | None, "msg": str}.
+    """
+    ensure_leverage_many([symbol for symbol, _ in orders], leverage)
+    session = get_session()
+
+    results: list[dict] = []
+    for i in range(0, len(orders), BATCH_MAX):
+        chunk   = orders[i:i + BATCH_MAX]
+        request = [_short_order_params(sym, price, tp_pct, sl_pct, notional) for sym, price in chunk]
+        logging.info("Placing %d SHORT orders in batch: %s", len(chunk), [sym for sym, _ in chunk])
+        try:
+            resp = session.place_batch_order(category="linear", request=request)
+        except Exception as e:
+            logging.error("place_batch_order failed: %s", e)
+            results += [{"ok": False, "orderId": None, "msg": str(e)} for _ in chunk]
+            continue
+        placed   = resp.get("result", {}).get("list", [])
+        statuses = resp.get("retExtInfo", {}).get("list", [])
+        for j in range(len(chunk)):
+            st = statuses[j] if j < len(statuses) else {}
+            od = placed[j]   if j < len(placed)   else {}
+            results.append({
+                "ok":      st.get("code", 0) == 0 and bool(od.get("orderId")),
+                "orderId": od.get("orderId") or None,
+                "msg":     st.get("msg", ""),
+            })
+        logging.info("place_batch_order response: %s", resp)
+    return results
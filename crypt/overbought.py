@@ -6,39 +6,92 @@
  - Все 4 интервала на символ запрашиваются параллельно.
  - Семафор ограничивает число одновременных HTTP-запросов (не символов).
  - Кэш 5 минут — повторный запуск в течение TTL возвращает готовые данные.
+
+Stale-while-revalidate:
+ - Результаты по символам публикуются в `partial` по мере готовности; каждая
+   публикация увеличивает `version`, читатели видят прошлый полный снимок
+   с наложенными свежими значениями плюс прогресс (done / total).
+ - auto_refresh() запускает следующий скан сам, за _REFRESH_AHEAD секунд до
+   истечения TTL, пока кто-то читает состояние (не дольше _IDLE_STOP).
+   Читателем считается только тот, кто получил данные: опрос по версии
+   с ответом «без изменений» скан не продлевает.
 """
 import asyncio
 import concurrent.futures
 import logging
 import time
+from collections.abc import Iterable
 from datetime import datetime
 
-from crypt.bit import session, calculate_rsi_series
+import crypt.profiler as profiler
+from crypt.bit import get_session, calculate_rsi_series
 
 RSI_PERIOD   = 14
 _CACHE_TTL   = 300.0   # 5 минут
 _POOL_SIZE   = 60      # потоков в выделенном пуле
 _SEM_SIZE    = 30      # макс. параллельных HTTP-запросов
+_REFRESH_AHEAD = 60.0  # за сколько секунд до истечения TTL начинать новый скан
+_IDLE_STOP   = 2 * _CACHE_TTL  # без читателей дольше этого авто-обновление останавливается
+_RETRY_AFTER = 30.0    # пауза авто-обновления после неудачи (нет списка символов / данных)
 
 _executor = concurrent.futures.ThreadPoolExecutor(
     max_workers=_POOL_SIZE, thread_name_prefix="ob"
 )
 
+# ключ результата → интервал Bybit
+TIMEFRAMES: dict[str, object] = {
+    "rsi_1d":  "D",
+    "rsi_4h":  240,
+    "rsi_1h":  60,
+    "rsi_15m": 15,
+    "rsi_1m":  1,
+}
+
 # ── публичное состояние ────────────────────────────────────────────
-state:       dict[str, dict] = {}
+state:       dict[str, dict] = {}    # последний ПОЛНЫЙ снимок
+partial:     dict[str, dict] = {}    # результаты текущего скана, по мере готовности
+progress:    dict = {"done": 0, "total": 0}
+version:     int  = 0                # растёт при каждой публикации
 updated_at:  str  = ""
 is_scanning: bool = False
 _cache_ts:   float = 0.0
+_last_read_ts: float = 0.0
+_refresher:  asyncio.Task | None = None
 
 
 def is_cache_fresh() -> bool:
     return bool(state) and (time.time() - _cache_ts < _CACHE_TTL)
 
 
+def mark_read() -> None:
+    """Отметить живого читателя (продлевает auto_refresh на _IDLE_STOP)."""
+    global _last_read_ts
+    _last_read_ts = time.time()
+
+
+def snapshot(reader: bool = True) -> dict:
+    """Текущее состояние: полный снимок + свежие частичные результаты.
+
+    reader=False — не отмечать чтение (например, опрос, которому нечего вернуть).
+    fresh_for — сколько секунд снимок ещё свежий; клиенту раньше опрашивать незачем.
+    """
+    if reader:
+        mark_read()
+    return {
+        "state":       {**state, **partial} if partial else state,
+        "updated_at":  updated_at,
+        "is_scanning": is_scanning,
+        "is_stale":    not is_cache_fresh(),
+        "fresh_for":   round(max(0.0, _cache_ts + _CACHE_TTL - time.time())) if state else 0,
+        "progress":    progress,
+        "version":     version,
+    }
+
+
 def _last_rsi(symbol: str, interval) -> float | None:
     """Синхронный fetch RSI-14 последней свечи (выполняется в потоке)."""
     try:
-        res = session.get_index_price_kline(
+        res = get_session().get_index_price_kline(
             category="linear", symbol=symbol,
             interval=interval, limit=RSI_PERIOD + 5,
         )
@@ -53,50 +106,122 @@ def _last_rsi(symbol: str, interval) -> float | None:
         return None
 
 
-async def run_scan(symbols: list[str]) -> None:
-    """Параллельно сканирует все символы и обновляет state."""
-    global state, updated_at, is_scanning, _cache_ts
-    if is_scanning:
-        return
-    is_scanning = True
+async def iter_scan(
+    symbols: Iterable[str],
+    timeframes: dict[str, object] = TIMEFRAMES,
+    concurrency: int = _SEM_SIZE,
+    executor: concurrent.futures.Executor | None = None,
+):
+    """Асинхронный генератор (symbol, {key: rsi}) в порядке готовности символов.
 
-    sem  = asyncio.Semaphore(_SEM_SIZE)
-    loop = asyncio.get_running_loop()
+    symbols — любой итерируемый объект (список, генератор, строки файла):
+    его читают concurrency воркеров, так что одновременно в работе не больше
+    concurrency символов, а вся вселенная в памяти не держится.
+    concurrency же ограничивает число одновременных HTTP-запросов.
+    Если символ не удалось посчитать, вместо словаря приходит None.
+    """
+    executor = executor or _executor
+    sem     = asyncio.Semaphore(concurrency)
+    loop    = asyncio.get_running_loop()
+    it      = iter(symbols)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
 
     async def _fetch(sym: str, interval):
         async with sem:
-            return await loop.run_in_executor(_executor, _last_rsi, sym, interval)
+            return await loop.run_in_executor(executor, _last_rsi, sym, interval)
 
     async def _one(sym: str):
-        # все 5 интервалов — параллельно
-        rsi_1d, rsi_4h, rsi_1h, rsi_15m, rsi_1m = await asyncio.gather(
-            _fetch(sym, "D"),
-            _fetch(sym, 240),
-            _fetch(sym, 60),
-            _fetch(sym, 15),
-            _fetch(sym, 1),
-        )
-        return sym, rsi_1d, rsi_4h, rsi_1h, rsi_15m, rsi_1m
+        try:
+            # все интервалы символа — параллельно
+            values = await asyncio.gather(*[_fetch(sym, iv) for iv in timeframes.values()])
+            return sym, dict(zip(timeframes, values))
+        except Exception as e:
+            logging.debug("ob.iter_scan %s: %s", sym, e)
+            return sym, None
 
+    async def _worker():
+        for sym in it:
+            await results.put(await _one(sym))
+        await results.put(None)   # этот воркер закончил
+
+    workers = [asyncio.ensure_future(_worker()) for _ in range(max(1, concurrency))]
     try:
-        results = await asyncio.gather(
-            *[_one(s) for s in symbols], return_exceptions=True
-        )
-        new: dict[str, dict] = {}
-        for r in results:
-            if isinstance(r, Exception):
-                continue
-            sym, rsi_1d, rsi_4h, rsi_1h, rsi_15m, rsi_1m = r
-            new[sym] = {
-                "rsi_1d":  rsi_1d,
-                "rsi_4h":  rsi_4h,
-                "rsi_1h":  rsi_1h,
-                "rsi_15m": rsi_15m,
-                "rsi_1m":  rsi_1m,
-            }
-        state     = new
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if item is None:
+                running -= 1
+            else:
+                yield item
+    finally:
+        for w in workers:
+            w.cancel()
+
+
+async def run_scan(symbols: list[str]) -> None:
+    """Параллельно сканирует все символы; публикует результаты по мере готовности.
+
+    state (полный снимок) заменяется только в конце, до этого читатели
+    получают его вместе с partial через snapshot(). Символ, по которому не
+    пришло ни одного значения (Bybit недоступен), сохраняет прошлую строку;
+    если данных нет совсем, прошлый снимок остаётся как есть.
+    """
+    global state, partial, version, updated_at, is_scanning, _cache_ts
+    if is_scanning:
+        return
+    is_scanning = True
+    partial = {}
+    progress.update(done=0, total=len(symbols))
+
+    try:
+        with profiler.maybe("scan", f"{len(symbols)} symbols"):
+            async for sym, row in iter_scan(symbols):
+                progress["done"] += 1
+                if row is not None and any(v is not None for v in row.values()):
+                    partial[sym] = row
+                    version += 1
+        if not partial:
+            logging.warning("overbought scan got no data for %d symbols; keeping previous snapshot",
+                            len(symbols))
+            return
+        listed    = set(symbols)
+        state     = {**{s: r for s, r in state.items() if s in listed}, **partial}
+        partial   = {}
+        version  += 1
         _cache_ts = time.time()
         updated_at = datetime.now().strftime("%H:%M:%S %d.%m.%Y")
         logging.info("overbought scan done: %d symbols", len(state))
     finally:
+        partial     = {}
         is_scanning = False
+
+
+async def auto_refresh(get_symbols) -> None:
+    """Перезапускает скан до истечения TTL, пока состояние кто-то читает.
+
+    get_symbols — корутина-функция, возвращающая список символов для скана.
+    """
+    while True:
+        await asyncio.sleep(max(1.0, _cache_ts + _CACHE_TTL - _REFRESH_AHEAD - time.time()))
+        if time.time() - _last_read_ts > _IDLE_STOP:
+            logging.info("overbought auto-refresh stopped: no readers")
+            return
+        if is_scanning:
+            continue
+        try:
+            symbols = await get_symbols()
+        except Exception as e:
+            logging.warning("overbought auto-refresh: symbol list failed: %s", e)
+            await asyncio.sleep(_RETRY_AFTER)
+            continue
+        scanned_at = _cache_ts
+        await run_scan(symbols)
+        if _cache_ts == scanned_at:   # скан ничего не опубликовал — не долбить Bybit
+            await asyncio.sleep(_RETRY_AFTER)
+
+
+def ensure_auto_refresh(get_symbols) -> None:
+    """Запустить auto_refresh(), если он ещё не работает."""
+    global _refresher
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.create_task(auto_refresh(get_symbols))
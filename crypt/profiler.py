@@ -0,0 +1,289 @@
+"""
+Профилирование по запросу на живом экземпляре.
+
+Администратор «взводит» цель (refresh — цикл refresh_tables, scan — run_scan,
+request — HTTP-запрос) на N следующих срабатываний. Каждое срабатывание
+профилируется целиком и сохраняется в PROFILE_DIR:
+
+- deterministic — cProfile, файл .prof (pstats: python -m pstats, snakeviz);
+  на Python 3.12+ cProfile видит все потоки, т.е. и fetch_rsi_multi в пуле;
+- sampling — выборка стеков всех потоков (sys._current_frames) каждые
+  interval секунд, файл .folded (flamegraph.pl, speedscope). Время
+  «настенное»: ожидание ответа Bybit попадает в выборку, а простаивающие
+  потоки (свободные воркеры пулов, пустой select event loop, таймеры) —
+  нет, см. _IDLE_LEAVES.
+
+Топ функций по собственному и полному времени хранится в runs и отдаётся
+через /api/admin/profile. Одновременно идёт не больше одной сессии:
+срабатывание, пришедшее во время другой, не профилируется и не тратит N.
+
+Пока ничего не взведено, maybe() — один поиск в пустом dict и общий
+nullcontext, без профилировщика и без выделений памяти.
+"""
+import asyncio
+import collections
+import contextlib
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROFILE_DIR = Path(__file__).parent / "profiles"
+MODES   = ("deterministic", "sampling")
+TARGETS = ("refresh", "scan", "request")
+
+_SAMPLE_INTERVAL = 0.005   # секунд между выборками стеков
+_MIN_INTERVAL    = 0.001   # чаще — поток выборки почти не отпускает GIL
+_MAX_RUNS        = 50      # сколько последних сессий держать в памяти и файлов на диске
+_MAX_FUNCTIONS   = 200     # сколько функций хранить в сводке сессии
+
+# (файл, функция) верхнего кадра потока, который ничего не делает
+_IDLE_LEAVES = {
+    ("thread.py",    "_worker"),                # воркер ThreadPoolExecutor ждёт задачу
+    ("threading.py", "wait"),                   # Event / Condition: таймеры, ping pybit
+    ("threading.py", "_wait_for_tstate_lock"),  # join()
+    ("selectors.py", "select"),                 # event loop без готовых событий
+}
+
+# ── публичное состояние ────────────────────────────────────────────
+armed: dict[str, dict] = {}                       # цель → {"remaining", "mode", "interval", "match"}
+runs:  collections.deque[dict] = collections.deque(maxlen=_MAX_RUNS)
+
+_NULL   = contextlib.nullcontext()
+_active = False
+_seq    = itertools.count(1)
+
+
+class _Sampler(threading.Thread):
+    """Фоновый поток, снимающий стеки всех остальных потоков."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.samples = 0
+        self.idle    = 0          # пропущенных стеков простаивающих потоков
+        self.period  = interval   # фактический средний шаг выборки, уточняется в stop()
+        self._stop_event = threading.Event()
+        self._t0 = time.perf_counter()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES:
+                    self.idle += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        if self.samples:
+            self.period = (time.perf_counter() - self._t0) / self.samples
+
+
+# ── управление ─────────────────────────────────────────────────────
+
+def arm(target: str, count: int, mode: str = "deterministic",
+        interval: float = _SAMPLE_INTERVAL, match: str = "") -> dict:
+    """Профилировать следующие *count* срабатываний цели.
+
+    match — для target="request": профилировать только пути с этим префиксом.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target {target!r}; use one of {', '.join(TARGETS)}")
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; use one of {', '.join(MODES)}")
+    if count < 1:
+        raise ValueError("count must be >= 1")
+    if not interval >= _MIN_INTERVAL:   # ловит и NaN
+        raise ValueError(f"interval must be >= {_MIN_INTERVAL} s")
+    if match and target != "request":
+        raise ValueError("match applies to target=request only")
+    armed[target] = {"remaining": count, "mode": mode, "interval": interval, "match": match}
+    logging.info("profiler: %s armed for %d run(s), mode=%s", target, count, mode)
+    return armed[target]
+
+
+def disarm(target: str | None = None) -> None:
+    if target is None:
+        armed.clear()
+    else:
+        armed.pop(target, None)
+
+
+def maybe(target: str, label: str = ""):
+    """Контекст-менеджер: профилирует блок, если цель взведена, иначе ничего не делает.
+
+    Вызывать из event loop (все цели — корутины), поэтому учёт N без блокировок.
+    """
+    cfg = armed.get(target)
+    if cfg is None or _active:
+        return _NULL
+    if cfg["match"] and not label.startswith(cfg["match"]):
+        return _NULL
+    cfg["remaining"] -= 1
+    if cfg["remaining"] <= 0:
+        armed.pop(target, None)
+    return _session(target, label, cfg["mode"], cfg["interval"])
+
+
+@contextlib.contextmanager
+def _session(target: str, label: str, mode: str, interval: float):
+    global _active
+    _active = True
+    run = {
+        "id":         f"{time.strftime('%Y%m%d-%H%M%S')}-{target}-{next(_seq)}",
+        "target":     target,
+        "label":      label,
+        "mode":       mode,
+        "started_at": time.time(),
+        "elapsed_s":  None,
+        "file":       None,
+        "functions":  None,
+    }
+    runs.append(run)
+    profiler = cProfile.Profile() if mode == "deterministic" else _Sampler(interval)
+    t0 = time.perf_counter()
+    try:
+        if mode == "deterministic":
+            profiler.enable()
+        else:
+            profiler.start()
+    except Exception as e:   # например, уже активен другой профилировщик
+        logging.error("profiler: could not start %s: %s", run["id"], e)
+        run["error"] = str(e)
+        _active = False
+        yield run
+        return
+    try:
+        yield run
+    finally:
+        if mode == "deterministic":
+            profiler.disable()
+        else:
+            profiler.stop()
+        run["elapsed_s"] = round(time.perf_counter() - t0, 4)
+        _active = False
+        # разбор и запись на диск — вне event loop
+        asyncio.get_running_loop().run_in_executor(None, _finish, run, profiler)
+
+
+# ── сохранение и сводка ────────────────────────────────────────────
+
+def _finish(run: dict, profiler) -> None:
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            path = PROFILE_DIR / f"{run['id']}.prof"
+            profiler.dump_stats(path)
+            run["functions"] = _pstats_functions(pstats.Stats(profiler))
+        else:
+            path = PROFILE_DIR / f"{run['id']}.folded"
+            path.write_text(
+                "".join(f"{';'.join(stack)} {n}\n" for stack, n in profiler.stacks.items()),
+                encoding="utf-8",
+            )
+            run["functions"] = _sample_functions(profiler)
+            run["samples"]   = profiler.samples
+            run["idle"]      = profiler.idle
+        run["file"] = str(path)
+        logging.info("profiler: %s saved to %s (%.3fs)", run["target"], path, run["elapsed_s"])
+    except Exception as e:
+        logging.error("profiler: could not save %s: %s", run["id"], e)
+        run["error"] = str(e)
+    _prune_files()
+
+
+def _prune_files() -> None:
+    """Keep at most _MAX_RUNS files in PROFILE_DIR — as many runs as the API can list."""
+    try:
+        files = sorted(
+            (p for p in PROFILE_DIR.iterdir() if p.suffix in (".prof", ".folded")),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for p in files[:-_MAX_RUNS]:
+            p.unlink(missing_ok=True)
+    except OSError as e:
+        logging.warning("profiler: could not prune %s: %s", PROFILE_DIR, e)
+
+
+def _pstats_functions(stats: pstats.Stats) -> list[dict]:
+    rows = [
+        {
+            "function": f"{func} ({os.path.basename(file)}:{line})",
+            "calls":    nc,
+            "self_s":   round(tt, 6),
+            "total_s":  round(ct, 6),
+        }
+        for (file, line, func), (_cc, nc, tt, ct, _callers) in stats.stats.items()
+    ]
+    return _keep_top(rows)
+
+
+def _sample_functions(sampler: _Sampler) -> list[dict]:
+    self_n:  collections.Counter[str] = collections.Counter()
+    total_n: collections.Counter[str] = collections.Counter()
+    for stack, n in sampler.stacks.items():
+        frames = stack[1:]          # без имени потока
+        if not frames:
+            continue
+        self_n[frames[-1]] += n
+        for func in set(frames):    # рекурсия считается один раз
+            total_n[func] += n
+    rows = [
+        {
+            "function": func,
+            "calls":    None,
+            "self_s":   round(self_n[func] * sampler.period, 6),
+            "total_s":  round(n * sampler.period, 6),
+        }
+        for func, n in total_n.items()
+    ]
+    return _keep_top(rows)
+
+
+def _keep_top(rows: list[dict]) -> list[dict]:
+    """Объединение топов по self_s и total_s, не больше _MAX_FUNCTIONS каждого."""
+    keep = {id(r): r for key in ("self_s", "total_s")
+            for r in sorted(rows, key=lambda r: r[key], reverse=True)[:_MAX_FUNCTIONS]}
+    return list(keep.values())
+
+
+def top(run: dict, sort: str = "self_s", limit: int = 30) -> list[dict]:
+    """Топ функций сессии по self_s или total_s."""
+    if sort not in ("self_s", "total_s"):
+        raise ValueError("sort must be self_s or total_s")
+    return sorted(run["functions"] or [], key=lambda r: r[sort], reverse=True)[:limit]
+
+
+def find_run(run_id: str) -> dict | None:
+    return next((r for r in runs if r["id"] == run_id), None)
+
+
+def status() -> dict:
+    """Взведённые цели и краткая сводка последних сессий (без полного списка функций)."""
+    return {
+        "armed": armed,
+        "active": _active,
+        "runs": [
+            {**{k: v for k, v in r.items() if k != "functions"}, "top": top(r, limit=5)}
+            for r in reversed(runs)
+        ],
+    }
@@ -0,0 +1,142 @@
+"""
+Консольный сканер RSI без веб-приложения (cron, исследования).
+
+Считает RSI-14 последней свечи по выбранным таймфреймам для списка символов
+или всей вселенной Trading USDT-LinearPerpetual и пишет по одной JSON-строке
+на символ сразу по готовности — в stdout или файл. Вся вселенная в памяти
+не накапливается. В конце в stderr печатаются время и запросов в секунду.
+
+Запуск:
+    python -m crypt.scan                                  # вся вселенная → stdout
+    python -m crypt.scan BTCUSDT ETHUSDT --timeframes 1h,15m
+    python -m crypt.scan --concurrency 60 --out scan.jsonl
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+
+import crypt.overbought as overbought
+from crypt.bit import get_session
+
+# имя в CLI → интервал Bybit
+TIMEFRAME_INTERVALS: dict[str, object] = {
+    "1m": 1, "3m": 3, "5m": 5, "15m": 15, "30m": 30,
+    "1h": 60, "2h": 120, "4h": 240, "6h": 360, "12h": 720,
+    "1d": "D", "1w": "W",
+}
+_DEFAULT_TIMEFRAMES = "1d,4h,1h,15m,1m"
+
+
+def fetch_universe() -> list[str]:
+    """All Trading USDT LinearPerpetual symbols (instruments-info, all pages)."""
+    session = get_session()
+    symbols, cursor = [], ""
+    while True:
+        res = session.get_instruments_info(category="linear", limit=1000, cursor=cursor)["result"]
+        symbols += [
+            i["symbol"] for i in res["list"]
+            if i.get("quoteCoin") == "USDT"
+            and i.get("contractType") == "LinearPerpetual"
+            and i.get("status") == "Trading"
+        ]
+        cursor = res.get("nextPageCursor") or ""
+        if not cursor:
+            return symbols
+
+
+def _read_symbols(f) -> Iterator[str]:
+    """Symbols from a text file, whitespace-separated, read line by line."""
+    for line in f:
+        yield from line.split()
+
+
+def _parse_timeframes(spec: str) -> dict[str, object]:
+    timeframes = {}
+    for tf in spec.split(","):
+        tf = tf.strip().lower()
+        if tf not in TIMEFRAME_INTERVALS:
+            raise SystemExit(f"Unknown timeframe {tf!r}; use {', '.join(TIMEFRAME_INTERVALS)}")
+        timeframes[f"rsi_{tf}"] = TIMEFRAME_INTERVALS[tf]
+    return timeframes
+
+
+async def scan(symbols: Iterable[str], timeframes: dict[str, object], concurrency: int, out) -> dict:
+    """Stream one JSON line per symbol to *out*; return run statistics."""
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="scan"
+    )
+    t0 = time.perf_counter()
+    done = failed = 0
+    try:
+        async for sym, row in overbought.iter_scan(symbols, timeframes, concurrency, executor):
+            done += 1
+            if row is None or all(v is None for v in row.values()):
+                failed += 1
+                line = {"symbol": sym, "error": "no data"}
+            else:
+                line = {"symbol": sym, **row}
+            line["ts"] = datetime.now().isoformat(timespec="seconds")
+            out.write(json.dumps(line) + "\n")
+            out.flush()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    elapsed = time.perf_counter() - t0
+    requests = done * len(timeframes)
+    return {
+        "symbols":  done,
+        "failed":   failed,
+        "requests": requests,
+        "elapsed":  elapsed,
+        "rps":      requests / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless RSI scanner with JSONL output")
+    parser.add_argument("symbols", nargs="*", help="symbols to scan; full perpetual universe if omitted")
+    parser.add_argument("--symbols-file", type=Path, default=None, help="one symbol per line")
+    parser.add_argument("--timeframes",   default=_DEFAULT_TIMEFRAMES,
+                        help=f"comma-separated, default {_DEFAULT_TIMEFRAMES}")
+    parser.add_argument("--concurrency",  type=int, default=overbought._SEM_SIZE,
+                        help="simultaneous HTTP requests")
+    parser.add_argument("--out", type=Path, default=None, help="JSONL file; stdout if omitted")
+    args = parser.parse_args()
+
+    timeframes = _parse_timeframes(args.timeframes)
+    symbols_in = args.symbols_file.open(encoding="utf-8") if args.symbols_file else None
+    symbols: Iterable[str] = args.symbols
+    if symbols_in is not None:
+        symbols = itertools.chain(symbols, _read_symbols(symbols_in))
+    elif not symbols:
+        symbols = fetch_universe()
+
+    out = args.out.open("w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        stats = asyncio.run(scan(symbols, timeframes, args.concurrency, out))
+    except BrokenPipeError:
+        # reader went away (e.g. `| head`): stop quietly, and keep the
+        # interpreter's final stdout flush from raising again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if args.out:
+            out.close()
+        if symbols_in is not None:
+            symbols_in.close()
+    print(
+        f"{stats['symbols']} symbols ({stats['failed']} failed), {stats['requests']} requests "
+        f"in {stats['elapsed']:.2f}s = {stats['rps']:.1f} req/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()